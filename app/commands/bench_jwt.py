@@ -0,0 +1,91 @@
+"""
+Compara el costo de verificar un token de acceso por petición.
+
+- PyJWT: jwt.decode (la librería que usa app/utils/jwt.py).
+- python-jose: jwt.decode, si está instalada (es opcional; solo se
+  incluye para comparar con la implementación anterior).
+- verify_token con el token ya en el cache de tokens verificados.
+
+Uso:
+    python -m app.commands.bench_jwt
+    python -m app.commands.bench_jwt --number 20000 --runs 5
+"""
+import argparse
+import timeit
+from typing import Callable, Dict, NamedTuple, Optional
+
+from app.utils import jwt as jwt_utils
+
+
+class BenchResult(NamedTuple):
+    method: str
+    us_per_call: float
+
+
+def sample_token() -> str:
+    """Token con los mismos claims que emite el login"""
+    return jwt_utils.create_access_token(
+        data={"sub": "estudiante1", "role": "user", "uid": 1, "active": True, "tv": 0}
+    )
+
+
+def build_methods(token: str) -> Dict[str, Optional[Callable[[], object]]]:
+    """Métodos a comparar; None si la librería no está instalada"""
+    import jwt
+
+    methods: Dict[str, Optional[Callable[[], object]]] = {
+        "PyJWT decode": lambda: jwt.decode(token, jwt_utils.SECRET_KEY, algorithms=[jwt_utils.ALGORITHM]),
+    }
+
+    try:
+        from jose import jwt as jose_jwt
+    except ImportError:  # python-jose es opcional
+        jose_jwt = None
+
+    methods["python-jose decode"] = (
+        (lambda: jose_jwt.decode(token, jwt_utils.SECRET_KEY, algorithms=[jwt_utils.ALGORITHM]))
+        if jose_jwt is not None else None
+    )
+
+    jwt_utils.verify_token(token)  # Deja el token en el cache
+    methods["verify_token (cache hit)"] = lambda: jwt_utils.verify_token(token)
+
+    return methods
+
+
+def bench(call: Callable[[], object], number: int, runs: int) -> float:
+    """Microsegundos por llamada de la repetición más rápida"""
+    if call() is None:
+        raise SystemExit("El token no se pudo verificar")
+
+    best = min(timeit.repeat(call, number=number, repeat=runs))
+    return best / number * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de verificar un JWT por petición")
+    parser.add_argument("--number", type=int, default=10000, help="Llamadas por repetición")
+    parser.add_argument("--runs", type=int, default=5, help="Repeticiones; se reporta la más rápida")
+    args = parser.parse_args()
+
+    results = []
+    skipped = []
+
+    for method, call in build_methods(sample_token()).items():
+        if call is None:
+            skipped.append(method)
+            continue
+        results.append(BenchResult(method, bench(call, args.number, args.runs)))
+
+    baseline = results[0].us_per_call
+
+    print(f"{'método':<28} {'µs/llamada':>11} {'vs PyJWT':>9}")
+    for result in results:
+        print(f"{result.method:<28} {result.us_per_call:11.2f} {baseline / result.us_per_call:8.1f}x")
+
+    for method in skipped:
+        print(f"{method:<28} {'(no instalado)':>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Compara el costo de serializar las respuestas grandes de la API.
+
+- jsonable_encoder + json: lo que hace FastAPI con response_model y
+  JSONResponse (validar, convertir a tipos JSON y volcar con la stdlib).
+- serialize_as + FastJSONResponse: validar y volcar en un paso con
+  pydantic-core (lo que usan las rutas del reporte y del cuestionario).
+
+Los datos son sintéticos (no requiere BD) y con la forma de
+GET /api/v1/users/reports/tests y GET /api/v1/questions/active.
+
+Uso:
+    python -m app.commands.bench_serialization
+    python -m app.commands.bench_serialization --users 2000 --tests-per-user 5 --runs 20
+"""
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Callable, List, NamedTuple
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models.enums import PredictionResult
+from app.schemas.question import QuestionResponse
+from app.schemas.user import UserReportResponse
+from app.utils.responses import FastJSONResponse, serialize_as
+
+
+class BenchResult(NamedTuple):
+    payload: str
+    method: str
+    ms_per_call: float
+    size_bytes: int
+
+
+def build_report(users: int, tests_per_user: int) -> List[dict]:
+    """Mismo formato que crud.tests.get_users_tests_report"""
+    now = datetime(2024, 1, 1)
+    return [
+        {
+            "user_id": user_id,
+            "username": f"estudiante{user_id}",
+            "email": f"estudiante{user_id}@universidad.edu.pe",
+            "tests": [
+                {
+                    "test_id": user_id * tests_per_user + n,
+                    "completed_at": now + timedelta(minutes=user_id + n),
+                    "prediction": random.choice((PredictionResult.S, PredictionResult.N)),
+                    "probability": random.random(),
+                    "ciclo": random.randint(1, 10),
+                    "genero": random.choice(("M", "F")),
+                    "facultad": "Ingeniería de Sistemas",
+                    "practicasprepro": random.choice(("Sí", "No")),
+                }
+                for n in range(tests_per_user)
+            ],
+        }
+        for user_id in range(1, users + 1)
+    ]
+
+
+def build_questionnaire(questions: int, options: int) -> List[SimpleNamespace]:
+    """Objetos con los atributos del modelo Question (como los devuelve el ORM)"""
+    now = datetime(2024, 1, 1)
+    return [
+        SimpleNamespace(
+            id=question_id,
+            question_key=f"pregunta{question_id}",
+            question_text=f"¿Con qué frecuencia se siente agotado al final del día? ({question_id})",
+            category="agotamiento",
+            order=question_id,
+            active=True,
+            created_at=now,
+            updated_at=now,
+            options=[
+                SimpleNamespace(
+                    id=question_id * options + n,
+                    question_id=question_id,
+                    option_text=f"Opción {n}",
+                    option_value=f"opcion_{n}",
+                    order=n + 1,
+                    created_at=now,
+                )
+                for n in range(options)
+            ],
+        )
+        for question_id in range(1, questions + 1)
+    ]
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    """FastAPI también construye el validador del response_model una sola vez"""
+    return TypeAdapter(schema)
+
+
+def encoder_and_json(schema: Any, content: Any) -> bytes:
+    """Camino por defecto de FastAPI: response_model -> jsonable_encoder -> json.dumps"""
+    adapter = _adapter(schema)
+    validated = adapter.validate_python(content, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def serialize_fast(schema: Any, content: Any) -> bytes:
+    return FastJSONResponse(serialize_as(schema, content)).body
+
+
+METHODS = {
+    "jsonable_encoder + json": encoder_and_json,
+    "serialize_as + FastJSONResponse": serialize_fast,
+}
+
+
+def bench(name: str, schema: Any, content: Any, runs: int) -> List[BenchResult]:
+    results = []
+
+    for method, serialize in METHODS.items():
+        call: Callable[[], bytes] = lambda: serialize(schema, content)
+        size = len(call())  # También calienta los TypeAdapter cacheados
+        best = min(timeit.repeat(call, number=1, repeat=runs))
+        results.append(BenchResult(name, method, best * 1000, size))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de serialización de las respuestas grandes")
+    parser.add_argument("--users", type=int, default=1000, help="Usuarios del reporte")
+    parser.add_argument("--tests-per-user", type=int, default=3, help="Tests por usuario del reporte")
+    parser.add_argument("--questions", type=int, default=19, help="Preguntas del cuestionario")
+    parser.add_argument("--options", type=int, default=5, help="Opciones por pregunta")
+    parser.add_argument("--runs", type=int, default=10, help="Repeticiones; se reporta la más rápida")
+    args = parser.parse_args()
+
+    random.seed(0)
+
+    results = [
+        *bench("reporte", List[UserReportResponse], build_report(args.users, args.tests_per_user), args.runs),
+        *bench("cuestionario", List[QuestionResponse], build_questionnaire(args.questions, args.options), args.runs),
+    ]
+
+    print(f"{'payload':<14} {'método':<34} {'ms/llamada':>11} {'bytes':>10}")
+    for result in results:
+        print(f"{result.payload:<14} {result.method:<34} {result.ms_per_call:11.3f} {result.size_bytes:>10}")
+
+    print()
+    for payload in dict.fromkeys(result.payload for result in results):
+        baseline, fast = [result for result in results if result.payload == payload]
+        print(f"{payload}: serialize_as es {baseline.ms_per_call / fast.ms_per_call:.1f}x más rápido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Aplica las migraciones SQL pendientes de migrations/ (una vez por deploy).
+
+En una base de datos vacía crea el esquema desde los modelos y marca todas
+las migraciones como aplicadas.
+
+Uso:
+    python -m app.commands.migrate
+    python -m app.commands.migrate --check   # sale con código 1 si hay pendientes o faltan columnas
+"""
+import argparse
+import logging
+import sys
+
+from app.database import engine
+from app.utils.migrations import pending_migrations, run_migrations, schema_drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migraciones de la base de datos")
+    parser.add_argument("--check", action="store_true", help="Solo listar las migraciones pendientes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.check:
+        pending = pending_migrations(engine)
+        print(f"Migraciones pendientes: {', '.join(pending) or 'ninguna'}")
+        missing = schema_drift(engine) if not pending else []
+        print(f"Faltan en la BD: {', '.join(missing) or 'nada'}")
+        sys.exit(1 if pending or missing else 0)
+
+    applied = run_migrations(engine)
+    print(f"Migraciones aplicadas: {', '.join(applied) or 'ninguna'}")
+
+    missing = schema_drift(engine)
+    if missing:
+        print(f"Faltan en la BD aun después de migrar: {', '.join(missing)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Perfil del tiempo de importación de la aplicación (python -X importtime).
+
+Importa app.main en un proceso nuevo (arranque en frío, como un worker),
+muestra los módulos más lentos y el tiempo por paquete, y falla si se
+excede el presupuesto o si se importa al arrancar un módulo que debe
+cargarse en el primer uso.
+
+Uso:
+    python -m app.commands.profile_imports
+    python -m app.commands.profile_imports --budget-ms 1500 --runs 5 --top 30
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+
+# Módulos que se importan en el primer uso (no deben aparecer al importar app.main)
+DEFERRED_MODULES = ("httpx", "jwt", "pytz", "pyarrow")
+
+DEFAULT_BUDGET_MS = 2000
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def profile(target: str) -> List[ImportTime]:
+    """Importa target en un intérprete nuevo y parsea la salida de -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        sys.exit(2)
+
+    # import time: self [us] | cumulative | imported package
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        times.append(ImportTime(module.strip(), int(self_us), int(cumulative_us)))
+
+    return times
+
+
+def by_package(times: List[ImportTime]) -> Dict[str, int]:
+    """Tiempo propio sumado por paquete raíz (sqlalchemy, fastapi, app, ...)"""
+    totals: Dict[str, int] = {}
+    for entry in times:
+        package = entry.module.split(".")[0]
+        totals[package] = totals.get(package, 0) + entry.self_us
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de importación en frío de la aplicación")
+    parser.add_argument("--target", default="app.main", help="Módulo a importar")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Presupuesto del tiempo total")
+    parser.add_argument("--runs", type=int, default=3, help="Repeticiones; se reporta la más rápida")
+    parser.add_argument("--top", type=int, default=20, help="Módulos a mostrar")
+    args = parser.parse_args()
+
+    # La corrida más rápida es la menos afectada por ruido de la máquina
+    runs = [profile(args.target) for _ in range(max(args.runs, 1))]
+    times = min(runs, key=lambda run: next(e.cumulative_us for e in run if e.module == args.target))
+    total_ms = next(e.cumulative_us for e in times if e.module == args.target) / 1000
+
+    print(f"{'self ms':>9} {'acum ms':>9}  módulo")
+    for entry in sorted(times, key=lambda e: e.self_us, reverse=True)[:args.top]:
+        print(f"{entry.self_us / 1000:9.1f} {entry.cumulative_us / 1000:9.1f}  {entry.module}")
+
+    print(f"\n{'self ms':>9}  paquete")
+    packages = sorted(by_package(times).items(), key=lambda item: item[1], reverse=True)
+    for package, self_us in packages[:args.top]:
+        print(f"{self_us / 1000:9.1f}  {package}")
+
+    imported = {entry.module.split(".")[0] for entry in times}
+    eager = [module for module in DEFERRED_MODULES if module in imported]
+
+    print(f"\nTotal {args.target}: {total_ms:.1f} ms (presupuesto {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if total_ms > args.budget_ms:
+        print("Se excedió el presupuesto de importación")
+        failed = True
+    if eager:
+        print(f"Importados al arrancar (deberían cargarse en el primer uso): {', '.join(eager)}")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Reconstruye answer_rollup (conteos para /api/v1/analytics/questions/distribution).
+
+Los workers ya la reconstruyen cada ANALYTICS_ROLLUP_REFRESH_MINUTES; el
+comando sirve para cron si esa tarea está desactivada (valor 0).
+
+Uso:
+    python -m app.commands.refresh_answer_rollup
+"""
+from app.database import SessionLocal
+from app.crud import analytics as crud_analytics
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rows = crud_analytics.refresh_answer_rollup(db)
+        print(f"Filas de answer_rollup: {rows}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
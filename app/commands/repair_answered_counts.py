@@ -0,0 +1,21 @@
+"""
+Recalcula tests.answered_count a partir de test_responses.
+
+Uso:
+    python -m app.commands.repair_answered_counts
+"""
+from app.database import SessionLocal
+from app.crud import tests as crud_tests
+
+
+def main():
+    db = SessionLocal()
+    try:
+        repaired = crud_tests.repair_answered_counts(db)
+        print(f"Tests corregidos: {repaired}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
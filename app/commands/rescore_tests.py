@@ -0,0 +1,52 @@
+"""
+Vuelve a puntuar los tests completados con el modelo ML (reanudable).
+
+Uso:
+    python -m app.commands.rescore_tests --job modelo-v2 --mode shadow
+    python -m app.commands.rescore_tests --job modelo-v2-final --mode replace --concurrency 16
+
+Si se interrumpe, volver a ejecutarlo con el mismo --job continúa desde
+el último bloque guardado; los tests que el ML no pudo puntuar se
+reintentan primero.
+"""
+import argparse
+import asyncio
+import logging
+
+from app.services.ml_service import MLService, ml_service
+from app.services.rescoring import RESCORE_MODES, RescoringJob
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore de tests completados")
+    parser.add_argument("--job", required=True, help="Nombre del trabajo (clave del checkpoint)")
+    parser.add_argument("--mode", choices=RESCORE_MODES, default="shadow")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Tests por bloque")
+    parser.add_argument("--concurrency", type=int, default=8, help="Peticiones al ML en paralelo")
+    parser.add_argument("--max-tests", type=int, default=None, help="Detenerse tras N tests")
+    parser.add_argument("--ml-url", default=None, help="URL de un modelo candidato (por defecto ML_SERVICE_URL)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    job = RescoringJob(
+        job_name=args.job,
+        ml=MLService(base_url=args.ml_url) if args.ml_url else ml_service,
+        mode=args.mode,
+        chunk_size=args.chunk_size,
+        concurrency=args.concurrency
+    )
+
+    try:
+        stats = asyncio.run(job.run(max_tests=args.max_tests))
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(
+        f"Procesados: {stats.processed}, fallidos: {stats.failed} (se reintentan en la próxima ejecución), "
+        f"último test: {stats.last_test_id}, {stats.tests_per_second} tests/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -10,18 +11,93 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5  # Conexiones que se abren en el warm-up y se mantienen en el pool
+    DB_MAX_OVERFLOW: int = 10
     
     # ML Service
     ML_SERVICE_URL: str = "https://burnoutml.onrender.com"
+    SHADOW_ML_SERVICE_URL: Optional[str] = None  # Modelo candidato puntuado en paralelo (sin afectar la respuesta)
+    SHADOW_SAMPLE_RATE: float = 0.1  # Fracción de tests completados enviados al candidato
+    SHADOW_TIMEOUT_SECONDS: float = 10.0
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 0
+    STATELESS_AUTH: bool = False  # Validar con los claims firmados; role/active/tv se leen de la BD cada TOKEN_STATE_CACHE_SECONDS
+    
+    # Rate limiting de login y registro (antes de bcrypt)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Keys en memoria por limitador
+    # Por IP son holgados: el campus sale a internet por pocas IPs (NAT)
+    LOGIN_RATE_PER_MINUTE_IP: float = 300
+    LOGIN_BURST_IP: int = 100
+    LOGIN_RATE_PER_MINUTE_USER: float = 5
+    LOGIN_BURST_USER: int = 5
+    REGISTER_RATE_PER_MINUTE_IP: float = 60
+    REGISTER_BURST_IP: int = 30
     
     # CORS
     CORS_ORIGINS: list = ["https://burnoutcheckapp.netlify.app", "http://localhost:4200"]
     
+    # Compression
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # Bytes
+    GZIP_COMPRESSION_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    COMPRESSION_OFFLOAD_SIZE: int = 65536  # Bytes; los cuerpos más grandes se comprimen en un thread
+    COMPRESSION_THREADS: int = 4  # Threads para compresión, aparte del threadpool de los endpoints
+    
+    # Caches
+    RESULT_CACHE_SIZE: int = 10000  # Resultados de tests serializados
+    TOKEN_CACHE_SIZE: int = 10000  # Tokens JWT ya verificados
+    TOKEN_STATE_CACHE_SECONDS: float = 5.0  # Vida del token_version/role/active leído de la BD (STATELESS_AUTH)
+    CACHE_VERSION_CHECK_SECONDS: float = 5.0  # Cada cuánto se revisa si otro worker invalidó un catálogo
+    
+    # Complete de tests
+    COMPLETE_LOCK_TIMEOUT_MS: int = 2000  # Espera máxima por el bloqueo de la fila del test (PostgreSQL)
+    COMPLETE_CLAIM_SECONDS: float = 60.0  # Tiempo tras el cual un complete en curso se da por fallido
+    COMPLETE_RETRY_AFTER_SECONDS: int = 2
+    
+    # Draft mode: respuestas de tests en curso en memoria, escritas en lotes
+    DRAFT_MODE: bool = False  # Con varios workers requiere sticky sessions
+    DRAFT_MAX_TESTS: int = 5000
+    DRAFT_FLUSH_INTERVAL_SECONDS: float = 2.0
+    DRAFT_FLUSH_BATCH_SIZE: int = 500
+    
+    # Idempotency-Key
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_MAX_KEYS: int = 10000
+    
+    # Admission control (503 con Retry-After bajo sobrecarga)
+    ADMISSION_CONTROL: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64  # Peticiones /api en curso por worker, entre todas las lanes
+    ADMISSION_MAX_WAIT_SECONDS: float = 2.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 2
+    
+    # Warm-up
+    WARMUP_RETRY_SECONDS: float = 5.0
+    
+    # Health (/health/ready)
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0  # Espera máxima por una conexión del pool
+    HEALTH_DB_MAX_LATENCY_MS: float = 500.0
+    HEALTH_LOOP_MAX_LAG_MS: float = 200.0
+    HEALTH_ML_REQUIRED: bool = False  # True: sin ML alcanzable el worker no está listo (si no, solo degradado)
+    ML_PROBE_INTERVAL_SECONDS: float = 15.0  # Sondeo del ML en segundo plano
+    ML_PROBE_TIMEOUT_SECONDS: float = 3.0
+    
+    # Event loop y threadpool
+    THREADPOOL_TOKENS: int = 40  # Hilos para endpoints def síncronos (default de AnyIO: 40)
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.5
+    LOOP_BLOCKING_DEBUG: bool = False  # Registra con su stack las llamadas que bloquean el loop
+    LOOP_BLOCKING_THRESHOLD_MS: float = 100.0
+    
+    # Analytics
+    EXPORT_CHUNK_SIZE: int = 10000  # Tests por bloque en la exportación Arrow
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300
+    ANALYTICS_CACHE_SIZE: int = 256
+    ANALYTICS_ROLLUP_REFRESH_MINUTES: int = 10  # Reconstrucción periódica de answer_rollup (0 = desactivada)
+    ANALYTICS_ROLLUP_MAX_AGE_MINUTES: int = 30  # Más antiguo (o vacío): la distribución se calcula en vivo
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
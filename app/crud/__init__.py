@@ -2,9 +2,13 @@
 from app.crud import questions
 from app.crud import tests
 from app.crud import recommendations
+from app.crud import analytics
+from app.crud import users
 
 __all__ = [
     "questions",
     "tests",
     "recommendations",
+    "analytics",
+    "users",
 ]
\ No newline at end of file
@@ -0,0 +1,275 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import case, delete, insert, select, func
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.models.answer_rollup import AnswerRollup
+from app.models.cache_version import CacheVersion
+from app.models.enums import PredictionResult
+from app.models.shadow_prediction import ShadowPrediction
+from app.models.test import Test
+from app.models.test_response import TestResponse
+from app.models.test_result import TestResult
+from app.services.cache_versions import rollup_versions
+from app.services.question_catalog import question_catalog
+from app.utils.cache import LRUCache
+
+
+# Cache de distribuciones por conjunto de filtros (facultad, ciclo)
+distribution_cache = LRUCache(maxsize=settings.ANALYTICS_CACHE_SIZE, ttl=settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+
+def refresh_answer_rollup(db: Session) -> int:
+    """
+    Reconstruye answer_rollup con un GROUP BY sobre
+    test_responses ⋈ tests ⋈ test_results, en una sola transacción.
+    Retorna el número de filas de la tabla.
+
+    La versión "answer_rollup" de cache_versions se incrementa primero:
+    su fila bloqueada serializa dos reconstrucciones simultáneas, su
+    updated_at queda como hora de construcción y los demás workers vacían
+    su distribution_cache al ver el cambio.
+    """
+    rollup_versions.bump(db, commit=False)
+
+    grouped = select(
+        TestResponse.question_id,
+        TestResponse.option_id,
+        TestResponse.answer_value,
+        Test.facultad,
+        Test.ciclo,
+        TestResult.prediction,
+        func.count().label("total")
+    ).join(
+        Test, TestResponse.test_id == Test.id
+    ).join(
+        TestResult, TestResult.test_id == Test.id
+    ).group_by(
+        TestResponse.question_id,
+        TestResponse.option_id,
+        TestResponse.answer_value,
+        Test.facultad,
+        Test.ciclo,
+        TestResult.prediction
+    )
+
+    db.execute(delete(AnswerRollup))
+    result = db.execute(insert(AnswerRollup).from_select(
+        ["question_id", "option_id", "answer_value", "facultad", "ciclo", "prediction", "total"],
+        grouped
+    ))
+    db.commit()
+
+    distribution_cache.clear()
+
+    return result.rowcount
+
+
+def get_rollup_age(db: Session) -> Tuple[Optional[datetime], Optional[timedelta]]:
+    """Hora de la última reconstrucción de answer_rollup y su antigüedad (None si nunca se construyó)"""
+    row = _rollup_version_query(db).first()
+
+    if row is None or row.version == 0:
+        return None, None
+
+    # Ambos con el reloj de la BD
+    return row.updated_at, row.now - row.updated_at
+
+
+def refresh_answer_rollup_if_stale(db: Session, max_age: timedelta) -> Optional[int]:
+    """
+    Reconstruye answer_rollup si tiene más de max_age. Retorna las filas, o None si estaba al día.
+
+    Los workers llegan al intervalo a la vez: la antigüedad se vuelve a leer
+    con la fila de versión bloqueada, y los que esperaron el bloqueo ven la
+    reconstrucción del primero y no repiten el GROUP BY.
+    """
+    _, age = get_rollup_age(db)
+    db.rollback()  # No dejar abierta la transacción de la lectura
+
+    if age is not None and age < max_age:
+        return None
+
+    rollup_versions.ensure(db)
+    row = _rollup_version_query(db).with_for_update().one()
+
+    if row.version > 0 and row.now - row.updated_at < max_age:
+        db.rollback()
+        return None
+
+    # refresh_answer_rollup hace el bump en esta misma transacción (con la fila ya bloqueada)
+    return refresh_answer_rollup(db)
+
+
+def _rollup_version_query(db: Session):
+    """Versión y hora de construcción de answer_rollup, con la hora actual de la BD (mismo reloj)"""
+    return db.query(
+        CacheVersion.version,
+        CacheVersion.updated_at,
+        func.now().label("now")
+    ).filter(CacheVersion.name == rollup_versions.name)
+
+
+def get_answer_distribution(db: Session, facultad: Optional[str] = None, ciclo: Optional[int] = None) -> dict:
+    """
+    Histograma de respuestas por pregunta y tasa de burnout (SI) por opción.
+    Filtros opcionales: facultad y ciclo.
+
+    Se lee desde answer_rollup; si nunca se construyó o tiene más de
+    ANALYTICS_ROLLUP_MAX_AGE_MINUTES, se calcula en vivo sobre las tablas.
+    """
+    if rollup_versions.changed(db):  # Otro worker reconstruyó answer_rollup
+        distribution_cache.clear()
+        rollup_versions.mark_loaded(db)
+
+    cache_key = (facultad, ciclo)
+    cached = distribution_cache.get(cache_key)
+
+    if cached is not None:
+        return cached
+
+    built_at, age = get_rollup_age(db)
+
+    if age is None or age > timedelta(minutes=settings.ANALYTICS_ROLLUP_MAX_AGE_MINUTES):
+        source = "live"
+        built_at = db.query(func.now()).scalar()
+        rows = _live_counts(db, facultad, ciclo)
+    else:
+        source = "rollup"
+        rows = _rollup_counts(db, facultad, ciclo)
+
+    # question_id -> answer_value -> [count, burnout_yes]
+    counts: Dict[int, Dict[str, list]] = {}
+    for row in rows:
+        answer_value = question_catalog.decode_answer(db, row.question_id, row.option_id, row.answer_value)
+        option_counts = counts.setdefault(row.question_id, {}).setdefault(answer_value, [0, 0])
+        option_counts[0] += row.total
+        if row.prediction == PredictionResult.S:
+            option_counts[1] += row.total
+
+    questions = question_catalog.get_questions(db)
+    distribution = []
+
+    for question in sorted(questions.values(), key=lambda q: q.order):
+        if question.id not in counts:
+            continue
+
+        options = [
+            {
+                "answer_value": answer_value,
+                "count": count,
+                "burnout_yes": burnout_yes,
+                "burnout_yes_rate": round(burnout_yes / count, 4) if count > 0 else 0.0,
+            }
+            for answer_value, (count, burnout_yes) in counts[question.id].items()
+        ]
+
+        distribution.append({
+            "question_id": question.id,
+            "question_key": question.question_key,
+            "question_text": question.question_text,
+            "total": sum(option["count"] for option in options),
+            "options": options,
+        })
+
+    report = {
+        "facultad": facultad,
+        "ciclo": ciclo,
+        "source": source,
+        "built_at": built_at,
+        "questions": distribution,
+    }
+
+    distribution_cache.set(cache_key, report)
+
+    return report
+
+
+def _rollup_counts(db: Session, facultad: Optional[str], ciclo: Optional[int]) -> list:
+    """Conteos por (pregunta, respuesta, predicción) desde answer_rollup"""
+    query = db.query(
+        AnswerRollup.question_id,
+        AnswerRollup.option_id,
+        AnswerRollup.answer_value,
+        AnswerRollup.prediction,
+        func.sum(AnswerRollup.total).label("total")
+    )
+
+    if facultad is not None:
+        query = query.filter(AnswerRollup.facultad == facultad)
+    if ciclo is not None:
+        query = query.filter(AnswerRollup.ciclo == ciclo)
+
+    return query.group_by(
+        AnswerRollup.question_id,
+        AnswerRollup.option_id,
+        AnswerRollup.answer_value,
+        AnswerRollup.prediction
+    ).all()
+
+
+def _live_counts(db: Session, facultad: Optional[str], ciclo: Optional[int]) -> list:
+    """Los mismos conteos calculados en vivo sobre test_responses ⋈ tests ⋈ test_results"""
+    query = db.query(
+        TestResponse.question_id,
+        TestResponse.option_id,
+        TestResponse.answer_value,
+        TestResult.prediction,
+        func.count().label("total")
+    ).join(
+        Test, TestResponse.test_id == Test.id
+    ).join(
+        TestResult, TestResult.test_id == Test.id
+    )
+
+    if facultad is not None:
+        query = query.filter(Test.facultad == facultad)
+    if ciclo is not None:
+        query = query.filter(Test.ciclo == ciclo)
+
+    return query.group_by(
+        TestResponse.question_id,
+        TestResponse.option_id,
+        TestResponse.answer_value,
+        TestResult.prediction
+    ).all()
+
+
+def get_shadow_agreement(db: Session) -> List[dict]:
+    """
+    Tasa de acuerdo y latencias del modelo candidato frente al actual,
+    agrupadas por versión del candidato.
+    """
+    rows = db.query(
+        ShadowPrediction.candidate_model_version,
+        func.count(ShadowPrediction.id).label("samples"),
+        func.sum(case(
+            (ShadowPrediction.candidate_prediction == ShadowPrediction.primary_prediction, 1), else_=0
+        )).label("agreements"),
+        func.sum(case(
+            (ShadowPrediction.candidate_error.isnot(None), 1), else_=0
+        )).label("candidate_errors"),
+        func.avg(func.abs(ShadowPrediction.candidate_probability - ShadowPrediction.primary_probability)).label("avg_probability_diff"),
+        func.avg(ShadowPrediction.primary_latency_ms).label("avg_primary_latency_ms"),
+        func.avg(ShadowPrediction.candidate_latency_ms).label("avg_candidate_latency_ms"),
+        func.max(ShadowPrediction.candidate_latency_ms).label("max_candidate_latency_ms")
+    ).group_by(ShadowPrediction.candidate_model_version).all()
+
+    report = []
+    for row in rows:
+        compared = row.samples - row.candidate_errors
+
+        report.append({
+            "candidate_model_version": row.candidate_model_version,
+            "samples": row.samples,
+            "agreements": row.agreements,
+            "agreement_rate": round(row.agreements / compared, 4) if compared > 0 else 0.0,
+            "candidate_errors": row.candidate_errors,
+            "avg_probability_diff": row.avg_probability_diff,
+            "avg_primary_latency_ms": row.avg_primary_latency_ms,
+            "avg_candidate_latency_ms": row.avg_candidate_latency_ms,
+            "max_candidate_latency_ms": row.max_candidate_latency_ms,
+        })
+
+    return report
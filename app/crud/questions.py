@@ -1,9 +1,11 @@
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from fastapi import HTTPException, status
 
 from app.models.question import Question, QuestionOption
 from app.schemas.question import QuestionCreate, QuestionUpdate, QuestionOptionCreate
+from app.services.question_catalog import question_catalog
 
 
 def get_question_by_id(db: Session, question_id: int) -> Optional[Question]:
@@ -72,6 +74,8 @@ def create_question(db: Session, question_data: QuestionCreate) -> Question:
     db.commit()
     db.refresh(new_question)
     
+    question_catalog.invalidate(db)
+    
     return new_question
 
 
@@ -104,6 +108,8 @@ def update_question(db: Session, question_id: int, question_update: QuestionUpda
     db.commit()
     db.refresh(question)
     
+    question_catalog.invalidate(db)
+    
     return question
 
 
@@ -120,6 +126,8 @@ def delete_question(db: Session, question_id: int) -> bool:
     db.delete(question)
     db.commit()
     
+    question_catalog.invalidate(db)
+    
     return True
 
 
@@ -140,6 +148,8 @@ def deactivate_question(db: Session, question_id: int) -> Question:
     db.commit()
     db.refresh(question)
     
+    question_catalog.invalidate(db)
+    
     return question
 
 
@@ -164,6 +174,8 @@ def create_question_option(db: Session, question_id: int, option_data: QuestionO
     db.commit()
     db.refresh(new_option)
     
+    question_catalog.invalidate(db)
+    
     return new_option
 
 
@@ -175,6 +187,17 @@ def delete_question_option(db: Session, option_id: int) -> bool:
         return False
     
     db.delete(option)
-    db.commit()
+    
+    try:
+        db.commit()
+    except IntegrityError:
+        # test_responses.option_id referencia la opción
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No se puede eliminar una opción que ya tiene respuestas registradas"
+        )
+    
+    question_catalog.invalidate(db)
     
     return True
\ No newline at end of file
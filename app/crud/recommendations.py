@@ -4,6 +4,7 @@ from fastapi import HTTPException, status
 
 from app.models.recommendation import Recommendation
 from app.schemas.test_result import RecommendationCreate, RecommendationUpdate
+from app.services.recommendation_catalog import recommendation_catalog
 
 
 def get_recommendation_by_id(db: Session, recommendation_id: int) -> Optional[Recommendation]:
@@ -65,6 +66,8 @@ def create_recommendation(db: Session, recommendation_data: RecommendationCreate
     db.commit()
     db.refresh(new_recommendation)
     
+    recommendation_catalog.invalidate(db)
+    
     return new_recommendation
 
 
@@ -104,6 +107,8 @@ def update_recommendation(
     db.commit()
     db.refresh(recommendation)
     
+    recommendation_catalog.invalidate(db)
+    
     return recommendation
 
 
@@ -120,6 +125,8 @@ def delete_recommendation(db: Session, recommendation_id: int) -> bool:
     db.delete(recommendation)
     db.commit()
     
+    recommendation_catalog.invalidate(db)
+    
     return True
 
 
@@ -140,4 +147,6 @@ def deactivate_recommendation(db: Session, recommendation_id: int) -> Recommenda
     db.commit()
     db.refresh(recommendation)
     
+    recommendation_catalog.invalidate(db)
+    
     return recommendation
\ No newline at end of file
@@ -1,17 +1,47 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional, Dict
+from sqlalchemy import delete, insert, literal, select, text, update, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional, Dict, NamedTuple, Sequence, Tuple
 from fastapi import HTTPException, status
-from datetime import datetime, date
-import pytz
+from datetime import datetime, date, timezone
 
 from app.models.test import Test
 from app.models.test_response import TestResponse
 from app.models.test_result import TestResult
-from app.models.question import Question
 from app.models.recommendation import Recommendation, TestRecommendation
 from app.models.enums import TestStatus, PredictionResult
 from app.schemas.test import TestCreate, TestResponseSubmit
-from app.schemas.test_result import TestResultCreate
+from app.schemas.test_result import TestResultCreate, TestResultDetailResponse, RecommendationResponse
+from app.services.recommendation_catalog import recommendation_catalog
+from app.services.cache_versions import result_versions
+from app.services.draft_store import draft_store
+from app.services.question_catalog import question_catalog
+from app.utils.cache import LRUCache
+from app.utils.responses import weak_etag
+from app.config import settings
+
+
+class CachedTestResult(NamedTuple):
+    """Resultado ya serializado, listo para responder sin consultar la BD"""
+    user_id: int
+    etag: str
+    last_modified: datetime
+    body: bytes
+
+
+# Un TestResult y sus recomendaciones solo cambian al eliminar el test
+# (delete_test) o al repuntuarlo en modo replace (app/services/rescoring.py).
+# Ambos incrementan result_versions y cada worker vacía su cache al verlo.
+result_cache = LRUCache(maxsize=settings.RESULT_CACHE_SIZE)
+
+
+def get_cached_result(db: Session, test_id: int) -> Optional[CachedTestResult]:
+    """Resultado en cache, vaciándolo antes si otro proceso modificó resultados"""
+    if result_versions.changed(db):
+        result_cache.clear()
+        result_versions.mark_loaded(db)
+    
+    return result_cache.get(test_id)
 
 
 def get_test_by_id(db: Session, test_id: int) -> Optional[Test]:
@@ -19,6 +49,19 @@ def get_test_by_id(db: Session, test_id: int) -> Optional[Test]:
     return db.query(Test).filter(Test.id == test_id).first()
 
 
+def get_user_test_with_responses(db: Session, test_id: int, user_id: int) -> Optional[Test]:
+    """
+    Obtiene un test del usuario junto con sus respuestas en una sola consulta.
+    Retorna None si el test no existe o no pertenece al usuario.
+    """
+    return db.query(Test).options(
+        joinedload(Test.responses)
+    ).filter(
+        Test.id == test_id,
+        Test.user_id == user_id
+    ).first()
+
+
 def get_user_tests(
     db: Session,
     user_id: int,
@@ -64,7 +107,7 @@ def add_test_response(db: Session, test_id: int, response_data: TestResponseSubm
     Agrega una respuesta a un test.
     Valida que:
     - El test exista y esté IN_PROGRESS
-    - La pregunta exista
+    - La pregunta exista y answer_value sea una de sus opciones
     - No haya duplicados (una pregunta solo se responde una vez)
     """
     # Verificar test
@@ -81,13 +124,12 @@ def add_test_response(db: Session, test_id: int, response_data: TestResponseSubm
             detail="El test ya está completado"
         )
     
-    # Verificar que la pregunta existe
-    question = db.query(Question).filter(Question.id == response_data.question_id).first()
-    if not question:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Pregunta no encontrada"
-        )
+    # Verificar pregunta y opción contra el catálogo en memoria
+    question_catalog.validate_answers(db, [response_data])
+    
+    # Se guarda el option_id; el texto solo si la pregunta no tiene opciones
+    option_id = question_catalog.encode_answer(db, response_data.question_id, response_data.answer_value)
+    answer_value = response_data.answer_value if option_id is None else None
     
     # Verificar que no haya respuesta duplicada
     existing_response = db.query(TestResponse).filter(
@@ -97,7 +139,8 @@ def add_test_response(db: Session, test_id: int, response_data: TestResponseSubm
     
     if existing_response:
         # Actualizar respuesta existente
-        existing_response.answer_value = response_data.answer_value
+        existing_response.option_id = option_id
+        existing_response.answer_value = answer_value
         db.commit()
         db.refresh(existing_response)
         return existing_response
@@ -106,10 +149,12 @@ def add_test_response(db: Session, test_id: int, response_data: TestResponseSubm
     new_response = TestResponse(
         test_id=test_id,
         question_id=response_data.question_id,
-        answer_value=response_data.answer_value
+        option_id=option_id,
+        answer_value=answer_value
     )
     
     db.add(new_response)
+    test.answered_count = Test.answered_count + 1  # Incremento atómico en SQL
     db.commit()
     db.refresh(new_response)
     
@@ -127,34 +172,103 @@ def get_test_responses_as_dict(db: Session, test_id: int) -> Dict[str, str]:
     Formato: {question_key: answer_value}
     Útil para enviar al servicio ML.
     """
-    responses = db.query(TestResponse, Question).join(
-        Question, TestResponse.question_id == Question.id
-    ).filter(TestResponse.test_id == test_id).all()
-    
-    return {question.question_key: response.answer_value for response, question in responses}
+    return get_responses_as_dicts(db, test_id, test_id).get(test_id, {})
 
 
-def complete_test(db: Session, test_id: int, expected_responses: int = 19) -> Test:
+def get_responses_as_dicts(
+    db: Session,
+    first_test_id: int,
+    last_test_id: int,
+    test_ids: Optional[List[int]] = None
+) -> Dict[int, Dict[str, str]]:
     """
-    Marca un test como completado.
-    Valida que tenga el número esperado de respuestas.
+    Obtiene en una sola consulta las respuestas de un rango de tests
+    (solo los de test_ids, si se indica).
+    Formato: {test_id: {question_key: answer_value}}
     """
-    test = get_test_by_id(db, test_id)
+    query = db.query(
+        TestResponse.test_id,
+        TestResponse.question_id,
+        TestResponse.option_id,
+        TestResponse.answer_value
+    ).filter(
+        TestResponse.test_id >= first_test_id,
+        TestResponse.test_id <= last_test_id
+    )
     
-    if not test:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test no encontrado"
+    if test_ids is not None:
+        query = query.filter(TestResponse.test_id.in_(test_ids))
+    
+    rows = query.all()
+    
+    # Claves y textos de opciones desde el catálogo en memoria
+    questions = question_catalog.get_questions(db)
+    
+    if any(row.question_id not in questions for row in rows):
+        questions = question_catalog.load(db)
+    
+    responses: Dict[int, Dict[str, str]] = {}
+    for row in rows:
+        responses.setdefault(row.test_id, {})[questions[row.question_id].question_key] = question_catalog.decode_answer(
+            db, row.question_id, row.option_id, row.answer_value
         )
     
+    return responses
+
+
+def get_test_for_update(db: Session, test_id: int) -> Optional[Test]:
+    """
+    Obtiene un test bloqueando su fila (SELECT ... FOR UPDATE) hasta el
+    commit o rollback de la transacción actual.
+    
+    En PostgreSQL espera el bloqueo como máximo COMPLETE_LOCK_TIMEOUT_MS.
+    
+    Raises:
+        HTTPException: 409 si otro proceso mantiene el bloqueo más tiempo
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"SET LOCAL lock_timeout = '{int(settings.COMPLETE_LOCK_TIMEOUT_MS)}ms'"))
+    
+    try:
+        return db.query(Test).filter(Test.id == test_id).with_for_update().first()
+    except OperationalError as e:
+        if getattr(e.orig, "sqlstate", None) != "55P03":  # lock_not_available
+            raise
+        db.rollback()
+        raise_test_in_progress()
+
+
+def raise_test_in_progress() -> None:
+    """409 para un complete duplicado mientras el primero está en curso"""
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="El test se está completando. Intenta nuevamente en unos segundos",
+        headers={"Retry-After": str(settings.COMPLETE_RETRY_AFTER_SECONDS)}
+    )
+
+
+def release_scoring_claim(db: Session, test_id: int) -> None:
+    """Libera la marca de complete en curso (ej: falló el ML) para permitir reintentos"""
+    db.execute(update(Test).where(Test.id == test_id).values(scoring_started_at=None))
+    db.commit()
+
+
+def complete_test(db: Session, test: Test, expected_responses: int) -> Test:
+    """
+    Marca un test como completado.
+    Valida que tenga el número esperado de respuestas.
+    
+    Espera el test ya bloqueado (get_test_for_update) y no hace commit:
+    el llamador confirma todo en una sola transacción.
+    """
     if test.status == TestStatus.COMPLETED:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El test ya está completado"
         )
     
-    # Contar respuestas
-    response_count = db.query(TestResponse).filter(TestResponse.test_id == test_id).count()
+    # Contador mantenido por add_test_response (sin COUNT(*))
+    response_count = test.answered_count
     
     if response_count < expected_responses:
         raise HTTPException(
@@ -162,37 +276,22 @@ def complete_test(db: Session, test_id: int, expected_responses: int = 19) -> Te
             detail=f"El test requiere {expected_responses} respuestas, solo hay {response_count}"
         )
     
+    import pytz  # Solo se usa aquí: se importa en el primer complete
+    
     # Marcar como completado
     test.status = TestStatus.COMPLETED
     test.completed_at = datetime.now(pytz.timezone("America/Lima"))
     
-    db.commit()
-    db.refresh(test)
-    
     return test
 
 
 def create_test_result(db: Session, result_data: TestResultCreate) -> TestResult:
     """
     Guarda el resultado de la predicción ML.
-    """
-    # Verificar que el test existe
-    test = get_test_by_id(db, result_data.test_id)
-    if not test:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test no encontrado"
-        )
-    
-    # Verificar que no tenga resultado ya
-    existing_result = db.query(TestResult).filter(TestResult.test_id == result_data.test_id).first()
-    if existing_result:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Este test ya tiene un resultado"
-        )
     
-    # Crear resultado
+    No hace commit. La unicidad por test la garantiza la restricción única
+    sobre test_id (IntegrityError en el flush si ya existe).
+    """
     new_result = TestResult(
         test_id=result_data.test_id,
         prediction=result_data.prediction,
@@ -201,45 +300,121 @@ def create_test_result(db: Session, result_data: TestResultCreate) -> TestResult
     )
     
     db.add(new_result)
-    db.commit()
-    db.refresh(new_result)
+    db.flush()  # Para obtener el ID sin hacer commit
     
     return new_result
 
 
-def assign_recommendations(db: Session, test_result_id: int, prediction: PredictionResult) -> List[Recommendation]:
+def assign_recommendations(db: Session, test_result_id: int, prediction: PredictionResult) -> List[RecommendationResponse]:
     """
-    Asigna recomendaciones a un resultado según la predicción.
+    Asigna recomendaciones a un resultado según la predicción (sin hacer commit).
     
     - Si prediction = "S": Asigna recomendaciones para resultado positivo
     - Si prediction = "N": Asigna recomendaciones para resultado negativo (o ninguna)
+    
+    Las recomendaciones salen del catálogo en memoria y se insertan con un
+    único INSERT ... SELECT que descarta las que ya no existen o se
+    desactivaron (catálogo desactualizado en este worker).
     """
-    # Obtener recomendaciones activas según el tipo de predicción
     is_positive = (prediction == PredictionResult.S)
     
-    recommendations = db.query(Recommendation).filter(
-        Recommendation.active == True,
-        Recommendation.for_positive_result == is_positive
-    ).all()
+    recommendations = recommendation_catalog.get_for_prediction(db, is_positive)
     
-    # Asignar recomendaciones
-    for rec in recommendations:
-        test_rec = TestRecommendation(
-            test_result_id=test_result_id,
-            recommendation_id=rec.id
-        )
-        db.add(test_rec)
+    if not recommendations:
+        return recommendations
     
-    db.commit()
+    ids = [rec.id for rec in recommendations]
+    inserted = set(db.execute(
+        insert(TestRecommendation).from_select(
+            ["test_result_id", "recommendation_id"],
+            select(literal(test_result_id), Recommendation.id).where(
+                Recommendation.id.in_(ids),
+                Recommendation.active == True
+            )
+        ).returning(TestRecommendation.recommendation_id)
+    ).scalars())
+    
+    if len(inserted) < len(ids):
+        recommendation_catalog.invalidate()
+        recommendations = [rec for rec in recommendations if rec.id in inserted]
     
     return recommendations
 
 
+def reassign_recommendations(db: Session, predictions: Sequence[Tuple[int, PredictionResult]]) -> None:
+    """
+    Reemplaza las recomendaciones de varios resultados (sin hacer commit).
+    
+    predictions son pares (test_result_id, nueva predicción). Usa un DELETE,
+    un SELECT de las recomendaciones que siguen activas y un único INSERT
+    con todos los vínculos, en lugar de assign_recommendations por resultado.
+    """
+    if not predictions:
+        return
+    
+    db.execute(delete(TestRecommendation).where(
+        TestRecommendation.test_result_id.in_([result_id for result_id, _ in predictions])
+    ))
+    
+    by_polarity = {
+        is_positive: [rec.id for rec in recommendation_catalog.get_for_prediction(db, is_positive)]
+        for is_positive in (True, False)
+    }
+    
+    # Descarta las que ya no existen o se desactivaron (catálogo desactualizado en este worker)
+    catalog_ids = set(by_polarity[True]) | set(by_polarity[False])
+    active_ids = set(db.execute(
+        select(Recommendation.id).where(Recommendation.id.in_(catalog_ids), Recommendation.active == True)
+    ).scalars()) if catalog_ids else set()
+    
+    if len(active_ids) < len(catalog_ids):
+        recommendation_catalog.invalidate()
+    
+    links = [
+        {"test_result_id": result_id, "recommendation_id": recommendation_id}
+        for result_id, prediction in predictions
+        for recommendation_id in by_polarity[prediction == PredictionResult.S]
+        if recommendation_id in active_ids
+    ]
+    
+    if links:
+        db.execute(insert(TestRecommendation).values(links))
+
+
 def get_test_result(db: Session, test_id: int) -> Optional[TestResult]:
     """Obtiene el resultado de un test"""
     return db.query(TestResult).filter(TestResult.test_id == test_id).first()
 
 
+def get_result_recommendations(db: Session, test_result_id: int) -> List[Recommendation]:
+    """Obtiene las recomendaciones asignadas a un resultado (no la tabla intermedia)"""
+    return db.query(Recommendation).join(
+        TestRecommendation, TestRecommendation.recommendation_id == Recommendation.id
+    ).filter(TestRecommendation.test_result_id == test_result_id).all()
+
+
+def cache_test_result(user_id: int, result: TestResultDetailResponse) -> CachedTestResult:
+    """
+    Serializa el resultado de un test y lo guarda en result_cache.
+    El ETag se deriva del id del resultado, del modelo y de predicted_at
+    (con microsegundos), así cambia en cuanto el resultado se repuntúa.
+    Es débil porque CompressionMiddleware puede comprimir el cuerpo.
+    """
+    predicted_at = result.predicted_at.replace(tzinfo=timezone.utc)
+    last_modified = predicted_at.replace(microsecond=0)
+    
+    cached = CachedTestResult(
+        user_id=user_id,
+        etag=weak_etag(f'"{result.test_id}-{result.id}-{result.model_version}-{int(predicted_at.timestamp() * 1_000_000)}"'),
+        last_modified=last_modified,
+        body=result.model_dump_json().encode()
+    )
+    
+    result_cache.set(result.test_id, cached)
+    
+    return cached
+
+
 def get_users_tests_report(
     db: Session,
     date_from: Optional[date] = None,
@@ -316,6 +491,26 @@ def get_burnout_stats(db: Session) -> dict:
     }
 
 
+def repair_answered_counts(db: Session) -> int:
+    """
+    Recalcula tests.answered_count desde test_responses donde no coincida.
+    Retorna el número de tests corregidos.
+    """
+    actual_count = select(func.count(TestResponse.id)).where(
+        TestResponse.test_id == Test.id
+    ).scalar_subquery()
+    
+    result = db.execute(
+        update(Test)
+        .where(Test.answered_count != actual_count)
+        .values(answered_count=actual_count)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    
+    return result.rowcount
+
+
 def delete_test(db: Session, test_id: int) -> bool:
     """
     Elimina un test y todas sus respuestas/resultados (cascade).
@@ -329,4 +524,8 @@ def delete_test(db: Session, test_id: int) -> bool:
     db.delete(test)
     db.commit()
     
+    result_cache.pop(test_id)
+    result_versions.bump(db)
+    draft_store.discard(test_id)
+    
     return True
@@ -0,0 +1,62 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import HTTPException, status
+
+from app.models import User
+
+
+# Columnas con índice único en users (ix_users_username, ix_users_email) y su mensaje
+UNIQUE_FIELDS = {
+    "username": "El nombre de usuario ya está en uso",
+    "email": "El correo electrónico ya está registrado",
+}
+
+
+def save_user(db: Session, user: User, commit: bool = True) -> User:
+    """
+    Escribe el usuario (alta o cambios) en un solo viaje a la BD.
+
+    La unicidad de username y email la validan los índices únicos, sin
+    SELECT previos: así tampoco hay carrera entre dos registros simultáneos.
+
+    Args:
+        commit: False para solo hacer flush (validar antes de otros cambios)
+
+    Raises:
+        HTTPException: 400 si el username o el email ya existen
+    """
+    try:
+        if commit:
+            db.commit()
+        else:
+            db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        field = _duplicated_field(e)
+
+        if field is None:
+            raise
+
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=UNIQUE_FIELDS[field]
+        )
+
+    if commit:
+        db.refresh(user)
+
+    return user
+
+
+def _duplicated_field(error: IntegrityError) -> Optional[str]:
+    """Campo duplicado según el índice violado (o el mensaje, si el driver no da el nombre)"""
+    diag = getattr(error.orig, "diag", None)
+    # PostgreSQL: "ix_users_username"; SQLite: "UNIQUE constraint failed: users.username"
+    source = getattr(diag, "constraint_name", None) or str(error.orig)
+
+    for field in UNIQUE_FIELDS:
+        if f"users_{field}" in source or f"users.{field}" in source:
+            return field
+
+    return None
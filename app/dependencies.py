@@ -2,11 +2,13 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
+from dataclasses import dataclass
 
+from app.config import settings
 from app.database import get_db
 from app.models import User
 from app.models.enums import UserRole
-from app.utils.jwt import verify_token
+from app.utils.jwt import TokenState, verify_token, is_token_revoked, token_states
 from app.schemas.auth import TokenData
 
 
@@ -14,6 +16,19 @@ from app.schemas.auth import TokenData
 security = HTTPBearer()
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Identidad mínima del usuario autenticado (sin objeto ORM)"""
+    id: int
+    username: str
+    role: UserRole
+    active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, username=user.username, role=user.role, active=user.active)
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
@@ -73,9 +88,90 @@ def get_current_active_user(
     return current_user
 
 
+def _get_token_state(db: Session, user_id: int) -> Optional[TokenState]:
+    """token_version, role y active actuales del usuario (None si ya no existe)"""
+    state = token_states.get(user_id)
+    
+    if state is None:
+        row = (
+            db.query(User.token_version, User.role, User.active)
+            .filter(User.id == user_id)
+            .first()
+        )
+        if row is None:
+            return None
+        
+        state = TokenState(row.token_version, row.role, row.active)
+        token_states.set(user_id, state)
+    
+    return state
+
+
+def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> Principal:
+    """
+    Obtiene la identidad del usuario actual.
+    
+    Con STATELESS_AUTH=True el usuario sale de los claims firmados del
+    token (uid, tv) y el token_version, role y active se toman de la BD a
+    través de token_states: una consulta por usuario cada
+    TOKEN_STATE_CACHE_SECONDS, así una revocación o un cambio de rol llega
+    a todos los workers en pocos segundos. Los tokens sin esos claims
+    (emitidos antes del cambio) y el modo por defecto validan contra la BD
+    como get_current_active_user.
+    """
+    if not settings.STATELESS_AUTH:
+        user = get_current_active_user(get_current_user(credentials, db))
+        return Principal.from_user(user)
+    
+    payload = verify_token(credentials.credentials)
+    
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido o expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if "uid" not in payload or "tv" not in payload:
+        user = get_current_active_user(get_current_user(credentials, db))
+        return Principal.from_user(user)
+    
+    state = _get_token_state(db, payload["uid"])
+    
+    if state is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario no encontrado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if is_token_revoked(state, payload["tv"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revocado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not state.active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuario inactivo"
+        )
+    
+    return Principal(
+        id=payload["uid"],
+        username=payload["sub"],
+        role=UserRole(state.role),
+        active=True
+    )
+
+
 def require_admin(
-    current_user: User = Depends(get_current_active_user)
-) -> User:
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
     """
     Verifica que el usuario actual sea administrador.
     """
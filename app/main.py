@@ -1,13 +1,22 @@
-from fastapi import FastAPI
+import asyncio
+
+from fastapi import Depends, FastAPI, Response, status
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from app.database import engine, Base
-
-# Models
-from app.models import user, question, enums, recommendation, test_response, test_result, test
+from app.dependencies import Principal, require_admin
+from app.middleware import AdmissionMiddleware, CompressionMiddleware, IdempotencyMiddleware
+from app.services.draft_store import draft_store
+from app.services.health import health_checker
+from app.services.shadow_scorer import shadow_scorer
+from app.services.rollup_refresher import run_rollup_refresher
+from app.services.ml_service import ml_service
+from app.services.warmup import warm_up, warm_up_until_ready
+from app.utils.loop_monitor import loop_monitor
+from app.utils.metrics import metrics
 
 # Routes
-from app.routes import auth, users, questions, recommendations, tests
+from app.routes import auth, users, questions, recommendations, tests, analytics
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -15,19 +24,79 @@ app = FastAPI(
     debug=settings.DEBUG
 )
 
-# Configurar CORS
+# Reintentos con Idempotency-Key (va dentro de la compresión: guarda el cuerpo sin comprimir)
+app.add_middleware(
+    IdempotencyMiddleware,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    max_entries=settings.IDEMPOTENCY_MAX_KEYS,
+)
+
+# Compresión de respuestas grandes (gzip / brotli)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_COMPRESSION_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+    offload_size=settings.COMPRESSION_OFFLOAD_SIZE,
+    threads=settings.COMPRESSION_THREADS,
+)
+
+# Control de admisión: rechaza con 503 antes de comprimir, leer el cuerpo o tocar la BD
+if settings.ADMISSION_CONTROL:
+    app.add_middleware(
+        AdmissionMiddleware,
+        max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+        max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
+
+# Configurar CORS (el más externo: también los 503 llevan sus headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
+# Tareas en segundo plano (se guarda la referencia para que no las recolecte el GC)
+background_tasks = set()
+
 @app.on_event("startup")
 async def startup_event():
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully")
+    loop_monitor.set_threadpool_tokens(settings.THREADPOOL_TOKENS)
+    background_tasks.add(asyncio.create_task(loop_monitor.run()))
+    if settings.LOOP_BLOCKING_DEBUG:
+        loop_monitor.start_watchdog()
+    
+    # El esquema lo crea/actualiza python -m app.commands.migrate (una vez por deploy)
+    if not await warm_up():
+        task = asyncio.create_task(warm_up_until_ready(settings.WARMUP_RETRY_SECONDS))
+        background_tasks.add(task)
+    
+    background_tasks.add(asyncio.create_task(health_checker.run_ml_probe()))
+    
+    if settings.DRAFT_MODE:
+        task = asyncio.create_task(draft_store.run(settings.DRAFT_FLUSH_INTERVAL_SECONDS))
+        background_tasks.add(task)
+    
+    if settings.ANALYTICS_ROLLUP_REFRESH_MINUTES > 0:
+        task = asyncio.create_task(run_rollup_refresher(settings.ANALYTICS_ROLLUP_REFRESH_MINUTES))
+        background_tasks.add(task)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in background_tasks:
+        task.cancel()
+    
+    loop_monitor.stop_watchdog()
+    
+    if settings.DRAFT_MODE:
+        await run_in_threadpool(draft_store.flush)
+    
+    await shadow_scorer.close()
+    await ml_service.close()
 
 @app.get("/")
 async def root():
@@ -37,9 +106,32 @@ async def root():
         "status": "running"
     }
 
+@app.get("/health/live")
+async def health_live():
+    """El proceso responde (no revisa dependencias: un fallo aquí implica reiniciar)"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready(response: Response):
+    """
+    Listo para recibir tráfico: warm-up terminado y pool de BD y event loop
+    dentro de sus umbrales. El ML (último sondeo de fondo) solo cuenta con
+    HEALTH_ML_REQUIRED; si no, un ML caído aparece en "degraded".
+    """
+    report = await health_checker.check()
+    if not report["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return report
+
+@app.get("/metrics")
+async def get_metrics(current_user: Principal = Depends(require_admin)):
+    """Contadores y gauges del proceso. **Solo administradores.**"""
+    return metrics.snapshot()
+
 # Routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["Users"])
 app.include_router(questions.router, prefix="/api/v1/questions", tags=["Questions"])
 app.include_router(tests.router, prefix="/api/v1/tests", tags=["Tests"])
 app.include_router(recommendations.router, prefix="/api/v1/recommendations", tags=["Recommendations"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
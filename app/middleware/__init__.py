@@ -0,0 +1,9 @@
+from app.middleware.admission import AdmissionMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+
+__all__ = [
+    "AdmissionMiddleware",
+    "CompressionMiddleware",
+    "IdempotencyMiddleware",
+]
@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import itertools
+import re
+from typing import Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.metrics import metrics
+
+
+class Lane(NamedTuple):
+    """Grupo de rutas con su propio límite de concurrencia y cola de espera"""
+    name: str
+    priority: int  # Menor número = se atiende antes cuando hay que esperar
+    limit: int  # Peticiones en curso como máximo
+    queue_size: int  # Peticiones esperando como máximo; el resto recibe 503
+    patterns: Sequence[Pattern] = ()
+    methods: Optional[Tuple[str, ...]] = None  # None: cualquier método
+
+
+# Se usa la primera que coincide; auth y lectura de preguntas primero, reportes al final
+ADMISSION_LANES = (
+    Lane("auth", 0, 16, 64, (re.compile(r"^/api/v1/auth/"),)),
+    Lane("questions", 0, 32, 128, (re.compile(r"^/api/v1/questions"),), methods=("GET",)),
+    Lane("complete", 1, 16, 64, (re.compile(r"^/api/v1/tests/\d+/complete$"),)),
+    Lane("tests", 1, 32, 128, (re.compile(r"^/api/v1/tests"),)),
+    Lane("reports", 2, 2, 4, (re.compile(r"^/api/v1/analytics/"), re.compile(r"^/api/v1/users/(reports|stats)/"))),
+)
+
+DEFAULT_LANE = Lane("default", 1, 32, 64)
+
+# Solo se controla la API; health, metrics y docs pasan siempre
+CONTROLLED_PREFIX = "/api/"
+
+
+class _LaneState:
+    __slots__ = ("lane", "in_flight", "waiting")
+
+    def __init__(self, lane: Lane):
+        self.lane = lane
+        self.in_flight = 0
+        self.waiting = 0
+
+
+class AdmissionMiddleware:
+    """
+    Control de admisión para degradar de forma predecible bajo sobrecarga.
+
+    - Cada lane limita sus peticiones en curso y su cola de espera.
+    - max_concurrency limita el total; cuando se libera un cupo lo toma la
+      petición en espera de mayor prioridad (auth antes que reportes).
+    - Si la cola está llena o la espera supera max_wait, se responde 503
+      con Retry-After de inmediato, sin tocar la BD ni el ML.
+
+    Todo ocurre en el event loop, así que el estado no necesita locks.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_concurrency: int = 64,
+        max_wait: float = 2.0,
+        retry_after: int = 2,
+        lanes: Sequence[Lane] = ADMISSION_LANES,
+        default_lane: Lane = DEFAULT_LANE
+    ):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.lanes = list(lanes)
+        self.states: Dict[str, _LaneState] = {lane.name: _LaneState(lane) for lane in [*lanes, default_lane]}
+        self.default_state = self.states[default_lane.name]
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future, _LaneState]] = []  # Heap por (prioridad, llegada)
+        self._sequence = itertools.count()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(CONTROLLED_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        state = self._match(scope["method"], scope["path"])
+
+        if not await self._acquire(state):
+            metrics.increment(f"admission.rejected.{state.lane.name}")
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Servicio saturado, intenta nuevamente en unos segundos"},
+                headers={"Retry-After": str(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._release(state)
+
+    def _match(self, method: str, path: str) -> _LaneState:
+        for lane in self.lanes:
+            if lane.methods is not None and method not in lane.methods:
+                continue
+            if any(pattern.match(path) for pattern in lane.patterns):
+                return self.states[lane.name]
+        return self.default_state
+
+    def _has_capacity(self, state: _LaneState) -> bool:
+        return state.in_flight < state.lane.limit and self.in_flight < self.max_concurrency
+
+    def _start(self, state: _LaneState) -> None:
+        state.in_flight += 1
+        self.in_flight += 1
+        metrics.set_gauge("admission.in_flight", self.in_flight)
+
+    async def _acquire(self, state: _LaneState) -> bool:
+        """True si la petición puede pasar (de inmediato o tras esperar en la cola)"""
+        # Pasa directo si hay cupo y nadie de mayor o igual prioridad que pueda avanzar espera delante
+        ahead = any(
+            not future.done() and priority <= state.lane.priority and waiting.in_flight < waiting.lane.limit
+            for priority, _, future, waiting in self._waiters
+        )
+        if self._has_capacity(state) and not ahead:
+            self._start(state)
+            return True
+
+        if state.waiting >= state.lane.queue_size:
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (state.lane.priority, next(self._sequence), future, state))
+        state.waiting += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait)
+            return True
+        except asyncio.TimeoutError:
+            if future.done():  # Se le asignó el cupo justo al vencer la espera
+                return True
+            future.cancel()
+            return False
+        except asyncio.CancelledError:
+            # El cliente se desconectó: devolver el cupo si ya se le había asignado
+            if future.done() and not future.cancelled():
+                self._release(state)
+            else:
+                future.cancel()
+            raise
+        finally:
+            state.waiting -= 1
+
+    def _release(self, state: _LaneState) -> None:
+        state.in_flight -= 1
+        self.in_flight -= 1
+        metrics.set_gauge("admission.in_flight", self.in_flight)
+        self._wake()
+
+    def _wake(self) -> None:
+        """Asigna los cupos libres a las peticiones en espera, por prioridad"""
+        skipped = []
+
+        while self._waiters and self.in_flight < self.max_concurrency:
+            waiter = heapq.heappop(self._waiters)
+            future, state = waiter[2], waiter[3]
+
+            if future.done():  # Venció su espera
+                continue
+
+            if state.in_flight >= state.lane.limit:
+                skipped.append(waiter)  # Su lane está llena: puede pasar una de menor prioridad
+                continue
+
+            self._start(state)
+            future.set_result(None)
+
+        for waiter in skipped:
+            heapq.heappush(self._waiters, waiter)
@@ -0,0 +1,216 @@
+import zlib
+from typing import Callable, Optional
+
+from anyio import CapacityLimiter, to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.metrics import metrics
+from app.utils.responses import weak_etag
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se usa gzip
+    brotli = None
+
+
+# Tipos de contenido que vale la pena comprimir
+COMPRESSIBLE_TYPES = ("application/json", "text/plain", "text/html", "text/csv")
+
+
+class _GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliEncoder:
+    encoding = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Comprime respuestas con brotli o gzip según Accept-Encoding.
+
+    - Respuestas completas menores a minimum_size se envían sin comprimir.
+    - Respuestas en streaming se comprimen chunk por chunk.
+    - Los cuerpos de hasta offload_size bytes se comprimen en el event loop
+      (cuesta menos que el salto a un thread); los más grandes en un worker
+      thread con su propio CapacityLimiter, para no ocupar los tokens del
+      threadpool que usan los endpoints sync.
+    - Un ETag fuerte de una respuesta comprimida se convierte en débil.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        offload_size: int = 65536,
+        threads: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.offload_size = offload_size
+        self.threads = threads
+        self._limiter: Optional[CapacityLimiter] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._select_encoding(Headers(scope=scope).get("accept-encoding", ""))
+
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def _select_encoding(self, accept_encoding: str) -> Optional[str]:
+        """Elige brotli si el cliente lo acepta y está instalado, si no gzip"""
+        accepted = set()
+        for item in accept_encoding.split(","):
+            token, _, params = item.strip().partition(";")
+            if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+                continue
+            accepted.add(token.strip().lower())
+
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def make_encoder(self, encoding: str):
+        if encoding == "br":
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.gzip_level)
+
+    async def run(self, func: Callable[[bytes], bytes], body: bytes) -> bytes:
+        """Comprime inline los cuerpos pequeños y en el limiter propio los grandes"""
+        if len(body) <= self.offload_size:
+            return func(body)
+
+        if self._limiter is None:
+            # Se crea en el primer uso, ya dentro del event loop
+            self._limiter = CapacityLimiter(self.threads)
+
+        return await to_thread.run_sync(func, body, limiter=self._limiter)
+
+
+class _CompressionResponder:
+    """Intercepta los mensajes de una respuesta y los comprime"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self.start_message: Optional[Message] = None
+        self.encoder = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Se retiene hasta conocer el primer chunk del cuerpo
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            await self._start(body, more_body)
+            return
+
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        await self._send_chunk(body, more_body)
+
+    async def _start(self, body: bytes, more_body: bool) -> None:
+        start_message = self.start_message
+        self.start_message = None
+        headers = MutableHeaders(raw=start_message["headers"])
+
+        content_type = headers.get("content-type", "")
+        compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+        too_small = not more_body and len(body) < self.middleware.minimum_size
+
+        if "content-encoding" in headers or not compressible or too_small:
+            self.passthrough = True
+            await self._send(start_message)
+            await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        self.encoder = self.middleware.make_encoder(self.encoding)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        # El cuerpo comprimido ya no es idéntico byte a byte: un ETag fuerte pasa a débil
+        etag = headers.get("etag")
+        if etag is not None:
+            headers["ETag"] = weak_etag(etag)
+
+        if more_body:
+            # Streaming: la longitud final no se conoce
+            del headers["Content-Length"]
+            await self._send(start_message)
+            await self._send_chunk(body, more_body)
+            return
+
+        compressed = await self.middleware.run(self.encoder.finish, body)
+        headers["Content-Length"] = str(len(compressed))
+        self._record(len(body), len(compressed), final=True)
+
+        await self._send(start_message)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _send_chunk(self, body: bytes, more_body: bool) -> None:
+        if more_body:
+            chunk = await self.middleware.run(self.encoder.compress, body)
+        else:
+            chunk = await self.middleware.run(self.encoder.finish, body)
+
+        self._record(len(body), len(chunk), final=not more_body)
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _record(self, size_in: int, size_out: int, final: bool) -> None:
+        self.bytes_in += size_in
+        self.bytes_out += size_out
+
+        if not final:
+            return
+
+        metrics.increment(f"compression.responses.{self.encoding}")
+        metrics.increment("compression.bytes_in", self.bytes_in)
+        metrics.increment("compression.bytes_out", self.bytes_out)
+        metrics.increment("compression.bytes_saved", self.bytes_in - self.bytes_out)
@@ -0,0 +1,178 @@
+import asyncio
+import re
+from typing import List, Optional, Pattern, Sequence, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.cache import LRUCache
+from app.utils.jwt import verify_token
+from app.utils.metrics import metrics
+
+
+# Endpoints de escritura que aceptan Idempotency-Key
+IDEMPOTENT_PATHS = (
+    re.compile(r"^/api/v1/tests/start$"),
+    re.compile(r"^/api/v1/tests/\d+/responses/batch$"),
+    re.compile(r"^/api/v1/tests/\d+/complete$"),
+)
+
+MAX_KEY_LENGTH = 255
+
+# Respuestas transitorias: reintentar con la misma key debe volver a procesarse
+# (409 mientras el complete está en curso, 425, 429 del rate limiter)
+TRANSIENT_STATUSES = frozenset({409, 425, 429})
+
+
+class _StoredResponse:
+    """Respuesta guardada (o en curso) para un (usuario, Idempotency-Key)"""
+
+    __slots__ = ("fingerprint", "done", "status", "headers", "body")
+
+    def __init__(self, fingerprint: Tuple[str, str]):
+        self.fingerprint = fingerprint
+        self.done = asyncio.Event()
+        self.status: Optional[int] = None
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body = b""
+
+
+class IdempotencyMiddleware:
+    """
+    Soporte de Idempotency-Key para reintentos de clientes móviles.
+
+    - La primera petición con una key se procesa y su respuesta se guarda
+      por (usuario, key) durante ttl segundos.
+    - Los reintentos reciben la respuesta guardada sin volver a procesarse.
+    - Los duplicados concurrentes esperan a que termine la primera.
+    - Solo se guardan resultados finales (2xx y 4xx no transitorios): las
+      5xx, las de TRANSIENT_STATUSES y las que traen Retry-After no, para
+      que el cliente pueda reintentar con la misma key.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        ttl: float = 86400,
+        max_entries: int = 10000,
+        paths: Sequence[Pattern] = IDEMPOTENT_PATHS
+    ):
+        self.app = app
+        self.ttl = ttl
+        self.paths = paths
+        self.store = LRUCache(maxsize=max_entries, ttl=ttl)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+
+        if key is None or not any(path.match(scope["path"]) for path in self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                status_code=400,
+                content={"detail": f"Idempotency-Key inválida (1-{MAX_KEY_LENGTH} caracteres)"}
+            )
+            await response(scope, receive, send)
+            return
+
+        user_id = self._get_user_id(headers)
+
+        if user_id is None:
+            # Sin token válido: la ruta responderá 401
+            await self.app(scope, receive, send)
+            return
+
+        store_key = (user_id, key)
+        fingerprint = (scope["method"], scope["path"])
+        stored = self.store.get(store_key)
+
+        if stored is None:
+            stored = _StoredResponse(fingerprint)
+            self.store.set(store_key, stored)
+            await self._process(store_key, stored, scope, receive, send)
+            return
+
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                status_code=422,
+                content={"detail": "La Idempotency-Key ya se usó en otro endpoint"}
+            )
+            await response(scope, receive, send)
+            return
+
+        # Duplicado en curso: esperar a la petición original
+        await stored.done.wait()
+
+        if stored.status is None:
+            # La original falló sin respuesta reutilizable: procesar normalmente
+            await self.app(scope, receive, send)
+            return
+
+        metrics.increment("idempotency.replayed")
+        await self._replay(stored, send)
+
+    def _get_user_id(self, headers: Headers) -> Optional[str]:
+        """Identifica al usuario desde el Bearer token (uid, o sub en tokens antiguos)"""
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+
+        if scheme.lower() != "bearer" or not token:
+            return None
+
+        payload = verify_token(token)
+
+        if payload is None:
+            return None
+
+        return str(payload.get("uid", payload.get("sub")))
+
+    async def _process(self, store_key, stored: _StoredResponse, scope: Scope, receive: Receive, send: Send) -> None:
+        """Procesa la petición original y guarda su respuesta mientras se envía"""
+        status_code = None
+        response_headers: List[Tuple[bytes, bytes]] = []
+        body_parts: List[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            if status_code is not None and _is_final(status_code, response_headers):
+                stored.status = status_code
+                stored.headers = response_headers
+                stored.body = b"".join(body_parts)
+                metrics.increment("idempotency.stored")
+            else:
+                self.store.pop(store_key)
+
+            stored.done.set()
+
+    async def _replay(self, stored: _StoredResponse, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": stored.headers + [(b"idempotent-replayed", b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+def _is_final(status_code: int, headers: List[Tuple[bytes, bytes]]) -> bool:
+    """True si la respuesta es un resultado definitivo que se puede repetir en los reintentos"""
+    if status_code >= 500 or status_code in TRANSIENT_STATUSES:
+        return False
+
+    return not any(name.lower() == b"retry-after" for name, _ in headers)
@@ -5,6 +5,11 @@ from app.models.test import Test
 from app.models.test_response import TestResponse
 from app.models.test_result import TestResult
 from app.models.recommendation import Recommendation, TestRecommendation
+from app.models.answer_rollup import AnswerRollup
+from app.models.shadow_test_result import ShadowTestResult
+from app.models.rescore_checkpoint import RescoreCheckpoint, RescoreFailure
+from app.models.shadow_prediction import ShadowPrediction
+from app.models.cache_version import CacheVersion
 
 __all__ = [
     # Enums
@@ -21,4 +26,10 @@ __all__ = [
     "TestResult",
     "Recommendation",
     "TestRecommendation",
+    "AnswerRollup",
+    "ShadowTestResult",
+    "RescoreCheckpoint",
+    "RescoreFailure",
+    "ShadowPrediction",
+    "CacheVersion",
 ]
\ No newline at end of file
@@ -0,0 +1,27 @@
+from app.database import Base
+from sqlalchemy import Column, String, Integer, Enum, Index
+from app.models.enums import PredictionResult
+
+
+class AnswerRollup(Base):
+    """
+    Conteos precalculados de respuestas por pregunta, opción, facultad,
+    ciclo y predicción. Se reconstruye desde test_responses ⋈ tests ⋈ test_results.
+    """
+    __tablename__ = "answer_rollup"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    question_id = Column(Integer, nullable=False)
+    option_id = Column(Integer, nullable=True)
+    answer_value = Column(String(100), nullable=True)  # Solo para preguntas sin opciones
+    facultad = Column(String(255), nullable=False)
+    ciclo = Column(Integer, nullable=False)
+    prediction = Column(Enum(PredictionResult), nullable=False)
+    total = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_answer_rollup_facultad_ciclo", "facultad", "ciclo"),
+    )
+
+    def __repr__(self):
+        return f"<AnswerRollup Q:{self.question_id} {self.facultad}/{self.ciclo} {self.prediction}: {self.total}>"
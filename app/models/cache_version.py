@@ -0,0 +1,15 @@
+from app.database import Base
+from sqlalchemy import Column, String, Integer, TIMESTAMP
+from sqlalchemy.sql import func
+
+
+class CacheVersion(Base):
+    """Versión de un cache en memoria, compartida entre procesos (ver app/services/cache_versions.py)"""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)  # "questions", "recommendations", "results", "answer_rollup"
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<CacheVersion {self.name} v{self.version}>"
@@ -0,0 +1,31 @@
+from app.database import Base
+from sqlalchemy import Column, String, Integer, TIMESTAMP, ForeignKey
+from sqlalchemy.sql import func
+
+
+class RescoreCheckpoint(Base):
+    """Progreso de un trabajo de rescore (permite reanudarlo donde quedó)"""
+    __tablename__ = "rescore_checkpoints"
+
+    job_name = Column(String(100), primary_key=True)
+    mode = Column(String(20), nullable=False)  # "shadow" o "replace"
+    last_test_id = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    started_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<RescoreCheckpoint {self.job_name} @ {self.last_test_id}>"
+
+
+class RescoreFailure(Base):
+    """Test que un trabajo de rescore no pudo puntuar; se reintenta en la siguiente ejecución"""
+    __tablename__ = "rescore_failures"
+
+    job_name = Column(String(100), ForeignKey("rescore_checkpoints.job_name", ondelete="CASCADE"), primary_key=True)
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), primary_key=True)
+    failed_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<RescoreFailure {self.job_name} test {self.test_id}>"
@@ -0,0 +1,33 @@
+from app.database import Base
+from sqlalchemy import Column, String, Integer, Enum, TIMESTAMP, Float, ForeignKey
+from sqlalchemy.sql import func
+from app.models.enums import PredictionResult
+
+
+class ShadowPrediction(Base):
+    """
+    Comparación en vivo entre el modelo actual y un modelo candidato
+    para un test completado (muestreado por el shadow scorer).
+    """
+    __tablename__ = "shadow_predictions"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # Modelo actual (el que vio el usuario)
+    primary_prediction = Column(Enum(PredictionResult), nullable=False)
+    primary_probability = Column(Float, nullable=False)
+    primary_model_version = Column(String(50), nullable=False)
+    primary_latency_ms = Column(Float, nullable=False)
+
+    # Modelo candidato (nulos si falló o no respondió a tiempo)
+    candidate_prediction = Column(Enum(PredictionResult), nullable=True)
+    candidate_probability = Column(Float, nullable=True)
+    candidate_model_version = Column(String(50), nullable=True)
+    candidate_latency_ms = Column(Float, nullable=True)
+    candidate_error = Column(String(255), nullable=True)
+
+    created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ShadowPrediction Test:{self.test_id} {self.primary_prediction}/{self.candidate_prediction}>"
@@ -0,0 +1,24 @@
+from app.database import Base
+from sqlalchemy import Column, String, Integer, Enum, TIMESTAMP, Float, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.models.enums import PredictionResult
+
+
+class ShadowTestResult(Base):
+    """Predicción de un modelo candidato para un test, sin reemplazar su TestResult"""
+    __tablename__ = "shadow_test_results"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), nullable=False, index=True)
+    prediction = Column(Enum(PredictionResult), nullable=False)
+    probability = Column(Float, nullable=False)
+    model_version = Column(String(50), nullable=False)
+    predicted_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
+
+    # Constraint: Una predicción por test y versión del modelo
+    __table_args__ = (
+        UniqueConstraint('test_id', 'model_version', name='unique_shadow_test_model'),
+    )
+
+    def __repr__(self):
+        return f"<ShadowTestResult Test:{self.test_id} {self.model_version}: {self.prediction}>"
@@ -19,8 +19,10 @@ class Test(Base):
     
     # Control de estado
     status = Column(Enum(TestStatus), nullable=False, default=TestStatus.IN_PROGRESS)
+    answered_count = Column(Integer, nullable=False, default=0, server_default="0")  # Preguntas respondidas
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
     completed_at = Column(TIMESTAMP, nullable=True)
+    scoring_started_at = Column(TIMESTAMP, nullable=True)  # Complete en curso (llamada al ML sin bloqueo)
 
     # Relaciones
     user = relationship("User", back_populates="tests")
@@ -10,7 +10,8 @@ class TestResponse(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     test_id = Column(Integer, ForeignKey("tests.id", ondelete="CASCADE"), nullable=False, index=True)
     question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False)
-    answer_value = Column(String(100), nullable=False)
+    option_id = Column(Integer, ForeignKey("question_options.id"), nullable=True)  # Respuesta codificada
+    answer_value = Column(String(100), nullable=True)  # Solo para preguntas sin opciones
     answered_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
 
     # Constraint: Una pregunta solo se puede responder una vez por test
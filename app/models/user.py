@@ -17,6 +17,7 @@ class User(Base):
     phone = Column(String(50), nullable=True, default="")
     email = Column(String(100), unique=True, nullable=False, index=True)
     active = Column(Boolean, default=True, nullable=False)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)  # Se incrementa para revocar tokens
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now(), nullable=False)
 
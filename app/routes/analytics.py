@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.database import get_db
+from app.dependencies import Principal, require_admin
+from app.crud import analytics as crud_analytics
+from app.schemas.analytics import AnswerDistributionResponse, RollupRefreshResponse, ShadowAgreementResponse
+from app.services.answer_export import ARROW_STREAM_MEDIA_TYPE, answer_matrix_exporter
+from app.utils.responses import FastJSONResponse
+
+
+router = APIRouter(default_response_class=FastJSONResponse)
+
+
+@router.get("/export/answers")
+def export_answer_matrix(
+    current_user: Principal = Depends(require_admin)
+):
+    """
+    Exporta la matriz de respuestas (tests × preguntas) para reentrenar el modelo.
+
+    **Solo administradores.**
+
+    Formato: stream Arrow IPC, una fila por test completado con columnas de
+    datos demográficos, predicción y una columna por pregunta activa. Las
+    categorías van codificadas como enteros (dictionary arrays).
+
+    Lectura: `pyarrow.ipc.open_stream(response.content).read_pandas()`
+    """
+    return StreamingResponse(
+        answer_matrix_exporter.stream(),
+        media_type=ARROW_STREAM_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="answers.arrows"'}
+    )
+
+
+@router.get("/questions/distribution", response_model=AnswerDistributionResponse)
+def get_answer_distribution(
+    facultad: Optional[str] = Query(None, description="Filtrar por facultad"),
+    ciclo: Optional[int] = Query(None, description="Filtrar por ciclo"),
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Distribución de respuestas por pregunta y tasa de burnout (SI) por opción.
+
+    **Solo administradores.**
+    Se calcula desde la tabla de conteos precalculados (answer_rollup), que
+    se reconstruye cada ANALYTICS_ROLLUP_REFRESH_MINUTES o con POST /rollup/refresh.
+    Si está vacía o vencida se calcula en vivo; source y built_at indican
+    de dónde salieron los conteos y de cuándo son.
+    """
+    return crud_analytics.get_answer_distribution(db, facultad, ciclo)
+
+
+@router.post("/rollup/refresh", response_model=RollupRefreshResponse)
+def refresh_answer_rollup(
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Reconstruye la tabla de conteos usada por /questions/distribution.
+
+    **Solo administradores.**
+    También disponible como comando: `python -m app.commands.refresh_answer_rollup`
+    """
+    return {"rows": crud_analytics.refresh_answer_rollup(db)}
+
+
+@router.get("/shadow/agreement", response_model=List[ShadowAgreementResponse])
+def get_shadow_agreement(
+    current_user: Principal = Depends(require_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Acuerdo entre el modelo actual y el candidato (SHADOW_ML_SERVICE_URL)
+    sobre la muestra de tests completados, con latencias de ambos.
+
+    **Solo administradores.**
+    """
+    return crud_analytics.get_shadow_agreement(db)
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 
+from app.crud import users as crud_users
 from app.database import get_db
 from app.models import User
 from app.models.enums import UserRole
@@ -8,15 +9,18 @@ from app.schemas.auth import RegisterRequest, LoginRequest, TokenResponse
 from app.schemas.user import UserResponse
 from app.utils.auth import hash_password, verify_password
 from app.utils.jwt import create_access_token
+from app.utils.rate_limit import enforce_rate_limit, login_ip_limiter, login_user_limiter, register_ip_limiter
+from app.utils.responses import FastJSONResponse
 from app.config import settings
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 def register(
     user_data: RegisterRequest,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -28,23 +32,10 @@ def register(
     
     Retorna el usuario creado sin el password.
     """
-    # Verificar si el username ya existe
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El nombre de usuario ya está en uso"
-        )
-    
-    # Verificar si el email ya existe
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El correo electrónico ya está registrado"
-        )
+    # Límite por IP antes de consultar la BD o calcular el hash
+    enforce_rate_limit(register_ip_limiter, client_ip(request))
     
-    # Crear nuevo usuario
+    # Crear nuevo usuario (los índices únicos validan username y email)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -57,15 +48,14 @@ def register(
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
     
-    return new_user
+    return crud_users.save_user(db, new_user)
 
 
 @router.post("/login", response_model=TokenResponse)
 def login(
     credentials: LoginRequest,
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
@@ -76,6 +66,10 @@ def login(
     
     Retorna un access_token para usar en requests autenticados.
     """
+    # Límites por IP y por usuario antes de consultar la BD o verificar con bcrypt
+    enforce_rate_limit(login_ip_limiter, client_ip(request))
+    enforce_rate_limit(login_user_limiter, credentials.username.lower())
+    
     # Buscar usuario por username
     user = db.query(User).filter(User.username == credentials.username).first()
     
@@ -94,6 +88,9 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Un login exitoso no consume el límite del usuario (solo los fallidos)
+    login_user_limiter.refund(credentials.username.lower())
+    
     # Verificar que el usuario esté activo
     if not user.active:
         raise HTTPException(
@@ -105,7 +102,10 @@ def login(
     access_token = create_access_token(
         data={
             "sub": user.username,
-            "role": user.role.value
+            "role": user.role.value,
+            "uid": user.id,
+            "active": user.active,
+            "tv": user.token_version
         }
     )
     
@@ -116,4 +116,9 @@ def login(
         access_token=access_token,
         token_type="bearer",
         expires_in=expires_in
-    )
\ No newline at end of file
+    )
+
+
+def client_ip(request: Request) -> str:
+    """IP del cliente (detrás de un proxy, uvicorn la toma de X-Forwarded-For con --proxy-headers)"""
+    return request.client.host if request.client else "unknown"
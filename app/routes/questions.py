@@ -3,7 +3,6 @@ from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
-from app.models import User
 from app.schemas.question import (
     QuestionCreate,
     QuestionUpdate,
@@ -12,11 +11,12 @@ from app.schemas.question import (
     QuestionOptionCreate,
     QuestionOptionResponse
 )
-from app.dependencies import require_admin, get_current_active_user
+from app.dependencies import Principal, require_admin, get_current_principal
 from app.crud import questions as crud_questions
+from app.utils.responses import FastJSONResponse, serialize_as
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 # ==================== ENDPOINTS PÚBLICOS/USUARIO ====================
@@ -24,7 +24,7 @@ router = APIRouter()
 @router.get("/active", response_model=List[QuestionResponse])
 def get_active_questions(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Obtiene todas las preguntas activas con sus opciones.
@@ -33,14 +33,14 @@ def get_active_questions(
     Requiere usuario autenticado.
     """
     questions = crud_questions.get_active_questions(db)
-    return questions
+    return FastJSONResponse(serialize_as(List[QuestionResponse], questions))
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
 def get_question(
     question_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Obtiene una pregunta específica por ID con sus opciones.
@@ -64,7 +64,7 @@ def list_all_questions(
     limit: int = 100,
     active_only: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Lista todas las preguntas (incluidas inactivas).
@@ -82,7 +82,7 @@ def list_all_questions(
 def create_question(
     question_data: QuestionCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Crea una nueva pregunta con sus opciones.
@@ -114,7 +114,7 @@ def update_question(
     question_id: int,
     question_update: QuestionUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Actualiza una pregunta existente.
@@ -132,7 +132,7 @@ def delete_question(
     question_id: int,
     force: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Elimina o desactiva una pregunta.
@@ -166,7 +166,7 @@ def add_question_option(
     question_id: int,
     option_data: QuestionOptionCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Agrega una nueva opción a una pregunta existente.
@@ -181,7 +181,7 @@ def add_question_option(
 def delete_question_option(
     option_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Elimina una opción de pregunta.
@@ -3,17 +3,17 @@ from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.database import get_db
-from app.models import User
 from app.schemas.test_result import (
     RecommendationCreate,
     RecommendationUpdate,
     RecommendationResponse
 )
-from app.dependencies import require_admin
+from app.dependencies import Principal, require_admin
 from app.crud import recommendations as crud_recommendations
+from app.utils.responses import FastJSONResponse
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 # ==================== ADMIN ENDPOINTS ====================
@@ -25,7 +25,7 @@ def list_recommendations(
     active_only: bool = False,
     for_positive_result: Optional[bool] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Lista todas las recomendaciones con filtros.
@@ -48,7 +48,7 @@ def list_recommendations(
 def get_recommendation(
     recommendation_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Obtiene una recomendación específica por ID.
@@ -70,7 +70,7 @@ def get_recommendation(
 def create_recommendation(
     recommendation_data: RecommendationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Crea una nueva recomendación.
@@ -100,7 +100,7 @@ def update_recommendation(
     recommendation_id: int,
     recommendation_update: RecommendationUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Actualiza una recomendación existente.
@@ -119,7 +119,7 @@ def delete_recommendation(
     recommendation_id: int,
     force: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """
     Elimina o desactiva una recomendación.
@@ -1,31 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from typing import List
+from email.utils import format_datetime
 
+from app.config import settings
 from app.database import get_db
-from app.models import User
-from app.models.enums import PredictionResult
 from app.schemas.test import (
     TestCreate,
     TestResponse as TestResponseSchema,
     TestDetailResponse,
     TestListResponse,
     TestResponseSubmit,
-    TestResponsesBatch
+    TestResponsesBatch,
+    TestResponseDetail
 )
-from app.schemas.test_result import TestResultDetailResponse, TestResultCreate
-from app.dependencies import get_current_active_user
+from app.schemas.test_result import TestResultDetailResponse
+from app.dependencies import Principal, get_current_principal
 from app.crud import tests as crud_tests
-from app.services.ml_service import ml_service
+from app.services.test_completion import test_completion_service
+from app.services.draft_store import draft_store
+from app.services.question_catalog import question_catalog
+from app.services.feature_schema import feature_schemas
+from app.utils.responses import FastJSONResponse, is_not_modified
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 @router.post("/start", response_model=TestResponseSchema, status_code=status.HTTP_201_CREATED)
 def start_test(
     test_data: TestCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -39,7 +44,7 @@ def start_test(
     # Preparar respuesta con contadores
     response = TestResponseSchema.model_validate(test)
     response.total_responses = 0
-    response.expected_responses = 19
+    response.expected_responses = feature_schemas.get(db).expected_responses
     
     return response
 
@@ -48,14 +53,29 @@ def start_test(
 def submit_response(
     test_id: int,
     response_data: TestResponseSubmit,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Envía una respuesta individual a un test.
     
     Si la pregunta ya fue respondida, actualiza la respuesta.
+    En modo borrador (DRAFT_MODE) la respuesta queda en memoria y se
+    escribe a la BD en segundo plano; response_id es null.
     """
+    if settings.DRAFT_MODE:
+        question_catalog.validate_answers(db, [response_data])
+        total_responses = draft_store.record(
+            db, test_id, current_user.id, {response_data.question_id: response_data.answer_value}
+        )
+        
+        return {
+            "message": "Respuesta guardada",
+            "response_id": None,
+            "total_responses": total_responses,
+            "remaining": feature_schemas.get(db).expected_responses - total_responses
+        }
+    
     # Verificar que el test pertenece al usuario
     test = crud_tests.get_test_by_id(db, test_id)
     
@@ -74,16 +94,14 @@ def submit_response(
     # Agregar respuesta
     response = crud_tests.add_test_response(db, test_id, response_data)
     
-    # Contar respuestas actuales
-    total_responses = db.query(crud_tests.TestResponse).filter(
-        crud_tests.TestResponse.test_id == test_id
-    ).count()
+    # Contador mantenido en la fila del test (sin COUNT(*))
+    total_responses = test.answered_count
     
     return {
         "message": "Respuesta guardada",
         "response_id": response.id,
         "total_responses": total_responses,
-        "remaining": 19 - total_responses
+        "remaining": feature_schemas.get(db).expected_responses - total_responses
     }
 
 
@@ -91,7 +109,7 @@ def submit_response(
 def submit_responses_batch(
     test_id: int,
     batch_data: TestResponsesBatch,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -99,6 +117,19 @@ def submit_responses_batch(
     
     Útil si el frontend envía todas las respuestas al final.
     """
+    if settings.DRAFT_MODE:
+        question_catalog.validate_answers(db, batch_data.responses)
+        total_responses = draft_store.record(
+            db, test_id, current_user.id,
+            {response_data.question_id: response_data.answer_value for response_data in batch_data.responses}
+        )
+        
+        return {
+            "message": "Respuestas guardadas",
+            "total_responses": total_responses,
+            "remaining": feature_schemas.get(db).expected_responses - total_responses
+        }
+    
     # Verificar test
     test = crud_tests.get_test_by_id(db, test_id)
     
@@ -114,106 +145,49 @@ def submit_responses_batch(
             detail="No tienes permiso para modificar este test"
         )
     
+    # Validar todo el lote antes de escribir (sin consultar la BD)
+    question_catalog.validate_answers(db, batch_data.responses)
+    
     # Agregar todas las respuestas
     for response_data in batch_data.responses:
         crud_tests.add_test_response(db, test_id, response_data)
     
-    total_responses = db.query(crud_tests.TestResponse).filter(
-        crud_tests.TestResponse.test_id == test_id
-    ).count()
+    total_responses = test.answered_count
     
     return {
         "message": "Respuestas guardadas",
         "total_responses": total_responses,
-        "remaining": 19 - total_responses
+        "remaining": feature_schemas.get(db).expected_responses - total_responses
     }
 
 
 @router.post("/{test_id}/complete", response_model=TestResultDetailResponse)
 async def complete_test(
     test_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Completa un test y obtiene la predicción del modelo ML.
     
-    Flujo:
-    1. Valida que el test tenga todas las respuestas (19)
-    2. Marca el test como COMPLETED
+    Flujo (el bloqueo del test no se mantiene durante la llamada al ML):
+    1. Valida que el test tenga respuesta para cada pregunta activa
+    2. Marca el test como COMPLETED (complete en curso) y confirma
     3. Envía datos al servicio ML
-    4. Guarda el resultado de la predicción
-    5. Asigna recomendaciones según la predicción
-    6. Retorna el resultado con recomendaciones
-    """
-    # Verificar test
-    test = crud_tests.get_test_by_id(db, test_id)
-    
-    if not test:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Test no encontrado"
-        )
-    
-    if test.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permiso para completar este test"
-        )
-    
-    # Completar test (valida que tenga 19 respuestas)
-    test = crud_tests.complete_test(db, test_id, expected_responses=19)
-    
-    # Preparar datos para ML
-    test_data = {
-        "ciclo": test.ciclo,
-        "genero": test.genero,
-        "facultad": test.facultad,
-        "practicasprepro": test.practicasprepro
-    }
-    
-    responses_dict = crud_tests.get_test_responses_as_dict(db, test_id)
-    
-    # Construir request para ML
-    ml_request = ml_service.build_prediction_request(test_data, responses_dict)
-    
-    # Llamar al servicio ML
-    ml_response = await ml_service.predict(ml_request)
-    
-    # Guardar resultado
-    result_data = TestResultCreate(
-        test_id=test_id,
-        prediction=PredictionResult.S if ml_response.resultado == "SI" else PredictionResult.N,
-        probability=ml_response.probabilidad,
-        model_version=ml_response.model_version
-    )
-    
-    result = crud_tests.create_test_result(db, result_data)
-    
-    # Asignar recomendaciones
-    recommendations = crud_tests.assign_recommendations(db, result.id, result.prediction)
-    
-    # Preparar respuesta manualmente para evitar problemas de serialización
-    from app.schemas.test_result import RecommendationResponse
+    4. Guarda el resultado y sus recomendaciones en un solo commit
+    5. Retorna el resultado con recomendaciones
     
-    result_response = TestResultDetailResponse(
-        id=result.id,
-        test_id=result.test_id,
-        prediction=result.prediction,
-        probability=result.probability,
-        model_version=result.model_version,
-        predicted_at=result.predicted_at,
-        recommendations=[RecommendationResponse.model_validate(rec) for rec in recommendations]
-    )
-    
-    return result_response
+    Si el test ya fue completado, retorna el resultado existente;
+    si hay otro complete en curso responde 409 con Retry-After.
+    """
+    return await test_completion_service.complete(db, test_id, current_user.id)
 
 
 @router.get("/me", response_model=List[TestListResponse])
 def get_my_tests(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -236,13 +210,18 @@ def get_my_tests(
 @router.get("/{test_id}", response_model=TestDetailResponse)
 def get_test_detail(
     test_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Obtiene el detalle completo de un test con todas sus respuestas.
     """
-    test = crud_tests.get_test_by_id(db, test_id)
+    # Modo borrador: escribir pendientes para que el detalle esté al día
+    if settings.DRAFT_MODE:
+        draft_store.flush([test_id])
+    
+    # Test + respuestas en una sola consulta, filtrando por dueño
+    test = crud_tests.get_user_test_with_responses(db, test_id, current_user.id)
     
     if not test:
         raise HTTPException(
@@ -250,31 +229,23 @@ def get_test_detail(
             detail="Test no encontrado"
         )
     
-    if test.user_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="No tienes permiso para ver este test"
-        )
-    
-    # Obtener respuestas con detalle de preguntas
-    from app.models.question import Question
-    from app.schemas.test import TestResponseDetail
+    # Textos de las preguntas desde el catálogo en memoria
+    questions = question_catalog.get_questions(db)
     
-    responses = db.query(crud_tests.TestResponse, Question).join(
-        Question, crud_tests.TestResponse.question_id == Question.id
-    ).filter(crud_tests.TestResponse.test_id == test_id).all()
+    if any(resp.question_id not in questions for resp in test.responses):
+        questions = question_catalog.load(db)
     
     # Preparar respuesta manualmente
     response_details = [
         TestResponseDetail(
             id=resp.id,
             question_id=resp.question_id,
-            question_key=q.question_key,
-            question_text=q.question_text,
-            answer_value=resp.answer_value,
+            question_key=questions[resp.question_id].question_key,
+            question_text=questions[resp.question_id].question_text,
+            answer_value=question_catalog.decode_answer(db, resp.question_id, resp.option_id, resp.answer_value),
             answered_at=resp.answered_at
         )
-        for resp, q in responses
+        for resp in test.responses
     ]
     
     test_data = TestDetailResponse(
@@ -287,8 +258,8 @@ def get_test_detail(
         status=test.status,
         created_at=test.created_at,
         completed_at=test.completed_at,
-        total_responses=len(responses),
-        expected_responses=19,
+        total_responses=len(response_details),
+        expected_responses=feature_schemas.get(db).expected_responses,
         responses=response_details
     )
     
@@ -298,12 +269,41 @@ def get_test_detail(
 @router.get("/{test_id}/result", response_model=TestResultDetailResponse)
 def get_test_result(
     test_id: int,
-    current_user: User = Depends(get_current_active_user),
+    request: Request,
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
     Obtiene el resultado y recomendaciones de un test completado.
+    
+    Se sirve desde cache con ETag/Last-Modified y responde 304 si el cliente
+    ya tiene la versión actual. No es inmutable (un rescore en modo replace
+    lo reescribe), por eso el cliente revalida en cada uso.
     """
+    cached = crud_tests.get_cached_result(db, test_id)
+    
+    if cached is None:
+        cached = _load_test_result(db, test_id, current_user)
+    elif cached.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para ver este resultado"
+        )
+    
+    headers = {
+        "ETag": cached.etag,
+        "Last-Modified": format_datetime(cached.last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    
+    if is_not_modified(request, cached.etag, cached.last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return FastJSONResponse(cached.body, headers=headers)
+
+
+def _load_test_result(db: Session, test_id: int, current_user: Principal) -> crud_tests.CachedTestResult:
+    """Consulta el resultado en la BD, valida permisos y lo guarda en cache"""
     test = crud_tests.get_test_by_id(db, test_id)
     
     if not test:
@@ -327,12 +327,9 @@ def get_test_result(
         )
     
     # Obtener recomendaciones reales (no la tabla intermedia)
-    from app.models.recommendation import Recommendation, TestRecommendation
     from app.schemas.test_result import RecommendationResponse
     
-    recommendations = db.query(Recommendation).join(
-        TestRecommendation, TestRecommendation.recommendation_id == Recommendation.id
-    ).filter(TestRecommendation.test_result_id == result.id).all()
+    recommendations = crud_tests.get_result_recommendations(db, result.id)
     
     # Construir respuesta manualmente
     result_response = TestResultDetailResponse(
@@ -345,13 +342,13 @@ def get_test_result(
         recommendations=[RecommendationResponse.model_validate(rec) for rec in recommendations]
     )
     
-    return result_response
+    return crud_tests.cache_test_result(test.user_id, result_response)
 
 
 @router.delete("/{test_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_test(
     test_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: Principal = Depends(get_current_principal),
     db: Session = Depends(get_db)
 ):
     """
@@ -7,11 +7,14 @@ from app.database import get_db
 from app.models import User
 from app.schemas.user import UserResponse, UserUpdate, UserChangePassword, UserDetailResponse, BurnoutStatsResponse, UserReportResponse
 from app.utils.auth import hash_password, verify_password
-from app.dependencies import get_current_active_user, require_admin
+from app.utils.jwt import revoke_user_tokens
+from app.dependencies import Principal, get_current_active_user, require_admin
 from app.crud import tests as crud_tests
+from app.crud import users as crud_users
+from app.utils.responses import FastJSONResponse, serialize_as
 
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 
 @router.get("/me", response_model=UserDetailResponse)
@@ -53,24 +56,11 @@ def update_my_profile(
     Solo se actualizan los campos proporcionados (partial update).
     No se puede cambiar el password aquí (usar /me/change-password).
     """
-    # Verificar si intenta cambiar username a uno ya existente
-    if user_update.username is not None and user_update.username != current_user.username:
-        existing_user = db.query(User).filter(User.username == user_update.username).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El nombre de usuario ya está en uso"
-            )
+    # Username y email únicos: los validan los índices al guardar
+    if user_update.username is not None:
         current_user.username = user_update.username
     
-    # Verificar si intenta cambiar email a uno ya existente
-    if user_update.email is not None and user_update.email != current_user.email:
-        existing_email = db.query(User).filter(User.email == user_update.email).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El correo electrónico ya está registrado"
-            )
+    if user_update.email is not None:
         current_user.email = user_update.email
     
     # Actualizar otros campos si se proporcionan
@@ -86,10 +76,7 @@ def update_my_profile(
     # Los usuarios normales no pueden cambiar su propio role
     # Solo admins pueden hacerlo (ver endpoint de admin)
     
-    db.commit()
-    db.refresh(current_user)
-    
-    return current_user
+    return crud_users.save_user(db, current_user)
 
 
 @router.post("/me/change-password", status_code=status.HTTP_200_OK)
@@ -112,6 +99,7 @@ def change_my_password(
     
     # Actualizar a nueva contraseña
     current_user.password = hash_password(password_data.new_password)
+    revoke_user_tokens(current_user)
     
     db.commit()
     
@@ -124,7 +112,7 @@ def change_my_password(
 def get_users_tests_report(
     date_from: Optional[date] = Query(None, description="Filtrar desde esta fecha (YYYY-MM-DD)"),
     date_to: Optional[date] = Query(None, description="Filtrar hasta esta fecha (YYYY-MM-DD)"),
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -133,12 +121,13 @@ def get_users_tests_report(
     **Solo administradores.**
     Acepta filtros opcionales: date_from y date_to (formato YYYY-MM-DD).
     """
-    return crud_tests.get_users_tests_report(db, date_from, date_to)
+    report = crud_tests.get_users_tests_report(db, date_from, date_to)
+    return FastJSONResponse(serialize_as(List[UserReportResponse], report))
 
 
 @router.get("/stats/burnout", response_model=BurnoutStatsResponse)
 def get_burnout_stats(
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -153,7 +142,7 @@ def get_burnout_stats(
 def list_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -162,13 +151,13 @@ def list_users(
     **Solo administradores.**
     """
     users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    return FastJSONResponse(serialize_as(List[UserResponse], users))
 
 
 @router.get("/{user_id}", response_model=UserDetailResponse)
 def get_user_by_id(
     user_id: int,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -205,7 +194,7 @@ def get_user_by_id(
 def update_user(
     user_id: int,
     user_update: UserUpdate,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -221,24 +210,11 @@ def update_user(
             detail="Usuario no encontrado"
         )
     
-    # Validar username único
-    if user_update.username is not None and user_update.username != user.username:
-        existing_user = db.query(User).filter(User.username == user_update.username).first()
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El nombre de usuario ya está en uso"
-            )
+    # Username y email únicos: los validan los índices al guardar
+    if user_update.username is not None:
         user.username = user_update.username
     
-    # Validar email único
-    if user_update.email is not None and user_update.email != user.email:
-        existing_email = db.query(User).filter(User.email == user_update.email).first()
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="El correo electrónico ya está registrado"
-            )
+    if user_update.email is not None:
         user.email = user_update.email
     
     # Actualizar otros campos
@@ -252,22 +228,29 @@ def update_user(
         user.phone = user_update.phone
     
     # Admins pueden cambiar role y active
-    if user_update.role is not None:
+    revoke = False
+    
+    if user_update.role is not None and user_update.role != user.role:
         user.role = user_update.role
+        revoke = True
     
-    if user_update.active is not None:
+    if user_update.active is not None and user_update.active != user.active:
         user.active = user_update.active
+        revoke = True
     
-    db.commit()
-    db.refresh(user)
+    # Los tokens emitidos llevan role/active firmados: invalidarlos.
+    # Primero se valida la unicidad (flush): la revocación en memoria no se deshace
+    if revoke:
+        crud_users.save_user(db, user, commit=False)
+        revoke_user_tokens(user)
     
-    return user
+    return crud_users.save_user(db, user)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_user(
     user_id: int,
-    current_user: User = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     db: Session = Depends(get_db)
 ):
     """
@@ -291,6 +274,7 @@ def delete_user(
             detail="No puedes eliminarte a ti mismo"
         )
     
+    revoke_user_tokens(user)
     db.delete(user)
     db.commit()
     
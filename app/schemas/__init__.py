@@ -46,10 +46,17 @@ from app.schemas.test_result import (
     TestResultCreate,
     TestResultResponse,
     TestResultDetailResponse,
-    MLPredictionRequest,
     MLPredictionResponse,
 )
 
+from app.schemas.analytics import (
+    AnswerOptionStats,
+    QuestionDistribution,
+    AnswerDistributionResponse,
+    RollupRefreshResponse,
+    ShadowAgreementResponse,
+)
+
 __all__ = [
     # User
     "UserBase",
@@ -95,6 +102,12 @@ __all__ = [
     "TestResultCreate",
     "TestResultResponse",
     "TestResultDetailResponse",
-    "MLPredictionRequest",
     "MLPredictionResponse",
+    
+    # Analytics
+    "AnswerOptionStats",
+    "QuestionDistribution",
+    "AnswerDistributionResponse",
+    "RollupRefreshResponse",
+    "ShadowAgreementResponse",
 ]
\ No newline at end of file
@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+
+class AnswerOptionStats(BaseModel):
+    """Conteo de una opción de respuesta y su relación con el burnout"""
+    answer_value: str
+    count: int
+    burnout_yes: int
+    burnout_yes_rate: float  # burnout_yes / count
+
+
+class QuestionDistribution(BaseModel):
+    """Histograma de respuestas de una pregunta"""
+    question_id: int
+    question_key: str
+    question_text: str
+    total: int
+    options: List[AnswerOptionStats]
+
+
+class AnswerDistributionResponse(BaseModel):
+    """Distribución de respuestas por pregunta para un conjunto de filtros"""
+    facultad: Optional[str] = None
+    ciclo: Optional[int] = None
+    source: str  # "rollup" (conteos precalculados) o "live" (GROUP BY al momento)
+    built_at: Optional[datetime] = None  # Cuándo se calcularon los conteos
+    questions: List[QuestionDistribution]
+
+
+class RollupRefreshResponse(BaseModel):
+    """Resultado de reconstruir la tabla de conteos"""
+    rows: int
+
+
+class ShadowAgreementResponse(BaseModel):
+    """Comparación entre el modelo actual y un modelo candidato (shadow)"""
+    candidate_model_version: Optional[str]  # None: el candidato falló o no respondió a tiempo
+    samples: int
+    agreements: int
+    agreement_rate: float  # agreements / (samples - candidate_errors)
+    candidate_errors: int
+    avg_probability_diff: Optional[float]  # Promedio de |candidato - actual|
+    avg_primary_latency_ms: float
+    avg_candidate_latency_ms: Optional[float]
+    max_candidate_latency_ms: Optional[float]
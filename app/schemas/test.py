@@ -49,7 +49,7 @@ class TestResponse(TestBase):
     
     # Contadores útiles
     total_responses: int = 0
-    expected_responses: int = 19
+    expected_responses: int = 0  # Preguntas activas (lo completan las rutas)
 
     model_config = ConfigDict(from_attributes=True)
 
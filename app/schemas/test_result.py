@@ -62,37 +62,6 @@ class TestResultDetailResponse(TestResultResponse):
     model_config = ConfigDict(from_attributes=True)
 
 
-class QuestionResponses(BaseModel):
-    """Schema para enviar al servicio ML externo"""
-    ciclo: int
-    genero: str
-    facultad: str
-    practicasprepro: str
-    pregunta1: str
-    pregunta2: str
-    pregunta3: str
-    pregunta4: str
-    pregunta5: str
-    pregunta6: str
-    pregunta7: str
-    pregunta8: str
-    pregunta9: str
-    pregunta10: str
-    pregunta11: str
-    pregunta12: str
-    pregunta13: str
-    pregunta14: str
-    pregunta15: str
-    pregunta16: str
-    pregunta17: str
-    pregunta18: str
-    pregunta19: str
-
-
-class MLPredictionRequest(BaseModel):
-    respuestas: QuestionResponses
-
-
 class MLPredictionResponse(BaseModel):
     """Schema de respuesta del servicio ML externo"""
     resultado: str  # "S" o "N"
@@ -1,6 +1,12 @@
 from app.services.ml_service import ml_service, MLService
+from app.services.question_catalog import question_catalog, QuestionCatalog
+from app.services.recommendation_catalog import recommendation_catalog, RecommendationCatalog
 
 __all__ = [
     "ml_service",
     "MLService",
+    "question_catalog",
+    "QuestionCatalog",
+    "recommendation_catalog",
+    "RecommendationCatalog",
 ]
\ No newline at end of file
@@ -0,0 +1,239 @@
+import io
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.enums import TestStatus
+from app.models.question import Question, QuestionOption
+from app.models.test import Test
+from app.models.test_response import TestResponse
+from app.models.test_result import TestResult
+from app.utils.metrics import metrics
+
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def _import_pyarrow():
+    """pyarrow es opcional: solo se necesita para la exportación"""
+    try:
+        import pyarrow
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Exportación no disponible: falta instalar pyarrow"
+        )
+    return pyarrow
+
+
+class _ExportQuestion(NamedTuple):
+    """Pregunta exportada como columna, con el código entero de cada opción"""
+    id: int
+    key: str
+    labels: List[str]  # Diccionario de la columna (código -> option_value)
+    option_codes: Dict[int, int]  # option_id -> código
+    value_codes: Dict[str, int]  # option_value -> código (filas sin option_id)
+
+
+class _Categories:
+    """Diccionario creciente valor -> código para una columna categórica"""
+
+    def __init__(self, values: Optional[List[str]] = None):
+        self.values: List[str] = list(values or [])
+        self.codes: Dict[str, int] = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value: Optional[str]) -> Optional[int]:
+        if value is None:
+            return None
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class AnswerMatrixExporter:
+    """
+    Exporta la matriz tests × preguntas (más datos demográficos y predicción)
+    como un stream Arrow IPC.
+
+    - Una fila por test completado con resultado; una columna por pregunta activa.
+    - Las columnas categóricas van codificadas como enteros (dictionary arrays):
+      pandas las lee como Categorical y NumPy puede usar los códigos directamente.
+    - Se recorre por rangos de test_id (keyset), así la memoria es constante
+      sin importar el número de tests.
+    """
+
+    def __init__(self, chunk_size: int = 10000):
+        self.chunk_size = chunk_size
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        Retorna el stream Arrow IPC por bloques de bytes (para StreamingResponse).
+
+        Raises:
+            HTTPException: 501 si pyarrow no está instalado
+        """
+        pa = _import_pyarrow()
+        return self._generate(pa)
+
+    def _generate(self, pa) -> Iterator[bytes]:
+        # Sesión propia: la de la petición se cierra antes de enviar el stream
+        db = SessionLocal()
+        try:
+            questions = self._load_questions(db)
+            demographics = {name: _Categories() for name in ("genero", "facultad", "practicasprepro", "model_version")}
+            prediction = _Categories(["N", "SI"])
+            schema = self._schema(pa, questions)
+
+            buffer = io.BytesIO()
+            options = pa.ipc.IpcWriteOptions(
+                emit_dictionary_deltas=True,
+                compression="zstd" if pa.Codec.is_available("zstd") else None
+            )
+            writer = pa.ipc.new_stream(pa.PythonFile(buffer, mode="w"), schema, options=options)
+
+            last_id = 0
+            while True:
+                tests = self._fetch_tests(db, last_id)
+                if not tests:
+                    break
+
+                last_id = tests[-1].id
+                answers = self._fetch_answers(db, tests[0].id, last_id)
+                batch = self._build_batch(pa, schema, questions, tests, answers, demographics, prediction)
+
+                writer.write_batch(batch)
+                metrics.increment("export.rows", len(tests))
+
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+            writer.close()
+            yield buffer.getvalue()
+        finally:
+            db.close()
+
+    def _load_questions(self, db: Session) -> List[_ExportQuestion]:
+        """Preguntas activas en orden, con el código de cada opción (según su orden)"""
+        questions = db.query(Question.id, Question.question_key).filter(
+            Question.active == True
+        ).order_by(Question.order).all()
+
+        options: Dict[int, List[QuestionOption]] = {}
+        for option in db.query(QuestionOption).order_by(QuestionOption.question_id, QuestionOption.order):
+            options.setdefault(option.question_id, []).append(option)
+
+        exported = []
+        for question in questions:
+            question_options = options.get(question.id, [])
+            exported.append(_ExportQuestion(
+                id=question.id,
+                key=question.question_key,
+                labels=[option.option_value for option in question_options],
+                option_codes={option.id: code for code, option in enumerate(question_options)},
+                value_codes={option.option_value: code for code, option in enumerate(question_options)}
+            ))
+
+        return exported
+
+    def _schema(self, pa, questions: List[_ExportQuestion]):
+        category = pa.dictionary(pa.int16(), pa.string())
+        answer = pa.dictionary(pa.int8(), pa.string())
+
+        return pa.schema(
+            [
+                ("test_id", pa.int32()),
+                ("user_id", pa.int32()),
+                ("ciclo", pa.int16()),
+                ("genero", category),
+                ("facultad", category),
+                ("practicasprepro", category),
+                ("completed_at", pa.timestamp("s")),
+                ("prediction", pa.dictionary(pa.int8(), pa.string())),
+                ("probability", pa.float32()),
+                ("model_version", category),
+            ]
+            + [(question.key, answer) for question in questions]
+        )
+
+    def _fetch_tests(self, db: Session, last_id: int):
+        return db.query(
+            Test.id,
+            Test.user_id,
+            Test.ciclo,
+            Test.genero,
+            Test.facultad,
+            Test.practicasprepro,
+            Test.completed_at,
+            TestResult.prediction,
+            TestResult.probability,
+            TestResult.model_version
+        ).join(
+            TestResult, TestResult.test_id == Test.id
+        ).filter(
+            Test.status == TestStatus.COMPLETED,
+            Test.id > last_id
+        ).order_by(Test.id).limit(self.chunk_size).all()
+
+    def _fetch_answers(self, db: Session, first_id: int, last_id: int):
+        # Rango de test_id: usa el índice; filas de tests fuera del bloque se ignoran
+        return db.query(
+            TestResponse.test_id,
+            TestResponse.question_id,
+            TestResponse.option_id,
+            TestResponse.answer_value
+        ).filter(
+            TestResponse.test_id >= first_id,
+            TestResponse.test_id <= last_id
+        ).yield_per(self.chunk_size)
+
+    def _build_batch(self, pa, schema, questions, tests, answers, demographics, prediction):
+        rows = {test.id: index for index, test in enumerate(tests)}
+        columns_by_question = {question.id: [None] * len(tests) for question in questions}
+        questions_by_id = {question.id: question for question in questions}
+
+        for test_id, question_id, option_id, answer_value in answers:
+            row = rows.get(test_id)
+            column = columns_by_question.get(question_id)
+            if row is None or column is None:
+                continue
+
+            question = questions_by_id[question_id]
+            if option_id is not None:
+                column[row] = question.option_codes.get(option_id)
+            else:
+                column[row] = question.value_codes.get(answer_value)
+
+        def categorical(values, categories: _Categories, index_type):
+            codes = pa.array([categories.code(value) for value in values], type=index_type)
+            return pa.DictionaryArray.from_arrays(codes, pa.array(categories.values, type=pa.string()))
+
+        arrays = [
+            pa.array([test.id for test in tests], type=pa.int32()),
+            pa.array([test.user_id for test in tests], type=pa.int32()),
+            pa.array([test.ciclo for test in tests], type=pa.int16()),
+            categorical([test.genero for test in tests], demographics["genero"], pa.int16()),
+            categorical([test.facultad for test in tests], demographics["facultad"], pa.int16()),
+            categorical([test.practicasprepro for test in tests], demographics["practicasprepro"], pa.int16()),
+            pa.array([test.completed_at for test in tests], type=pa.timestamp("s")),
+            categorical([test.prediction.value for test in tests], prediction, pa.int8()),
+            pa.array([test.probability for test in tests], type=pa.float32()),
+            categorical([test.model_version for test in tests], demographics["model_version"], pa.int16()),
+        ]
+
+        for question in questions:
+            arrays.append(pa.DictionaryArray.from_arrays(
+                pa.array(columns_by_question[question.id], type=pa.int8()),
+                pa.array(question.labels, type=pa.string())
+            ))
+
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+# Instancia global del exportador
+answer_matrix_exporter = AnswerMatrixExporter(chunk_size=settings.EXPORT_CHUNK_SIZE)
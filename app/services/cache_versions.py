@@ -0,0 +1,89 @@
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.cache_version import CacheVersion
+
+
+class SharedVersion:
+    """
+    Versión de un cache en memoria compartida entre procesos (tabla cache_versions).
+
+    Cada worker invalida solo su propio cache al escribir; con bump() el
+    cambio llega también a los demás, que consultan la versión con changed()
+    como máximo cada check_interval segundos (una lectura por clave primaria).
+    """
+
+    def __init__(self, name: str, check_interval: float = 5.0):
+        self.name = name
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._seen: Optional[int] = None  # Versión con la que se cargó el cache local
+        self._checked_at = 0.0
+
+    @property
+    def seen(self) -> Optional[int]:
+        """Versión compartida con la que se cargó el cache local (None si aún no se cargó)"""
+        return self._seen
+
+    def mark_loaded(self, db: Session) -> None:
+        """Registra la versión vigente al cargar el cache local"""
+        version = self._read(db)
+
+        with self._lock:
+            self._seen = version
+            self._checked_at = time.monotonic()
+
+    def changed(self, db: Session) -> bool:
+        """True si otro proceso incrementó la versión desde que se cargó el cache local"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return False
+
+        version = self._read(db)
+
+        with self._lock:
+            self._checked_at = time.monotonic()
+
+            if self._seen is None:  # Primera consulta: se toma como punto de partida
+                self._seen = version
+                return False
+
+            return version != self._seen
+
+    def bump(self, db: Session, commit: bool = True) -> None:
+        """
+        Incrementa la versión y confirma (llamar después del commit de la escritura).
+        Con commit=False queda en la transacción actual, con la fila bloqueada hasta el commit.
+        """
+        # Upsert: dos workers que crean la fila a la vez no chocan por la clave primaria
+        stmt = insert(CacheVersion).values(name=self.name, version=1)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[CacheVersion.name],
+            set_={"version": CacheVersion.version + 1, "updated_at": func.now()}
+        ))
+
+        if commit:
+            db.commit()
+
+    def ensure(self, db: Session) -> None:
+        """Crea la fila con versión 0 si no existe, para poder bloquearla con FOR UPDATE"""
+        db.execute(insert(CacheVersion).values(name=self.name, version=0).on_conflict_do_nothing(
+            index_elements=[CacheVersion.name]
+        ))
+        db.commit()
+
+    def _read(self, db: Session) -> int:
+        version = db.query(CacheVersion.version).filter(CacheVersion.name == self.name).scalar()
+        return version or 0
+
+
+# Versiones compartidas de los caches por proceso
+question_versions = SharedVersion("questions", settings.CACHE_VERSION_CHECK_SECONDS)
+recommendation_versions = SharedVersion("recommendations", settings.CACHE_VERSION_CHECK_SECONDS)
+result_versions = SharedVersion("results", settings.CACHE_VERSION_CHECK_SECONDS)
+rollup_versions = SharedVersion("answer_rollup", settings.CACHE_VERSION_CHECK_SECONDS)
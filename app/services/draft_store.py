@@ -0,0 +1,308 @@
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.enums import TestStatus
+from app.models.test import Test
+from app.models.test_response import TestResponse
+from app.services.question_catalog import question_catalog
+from app.utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Draft:
+    """Respuestas de un test en curso: todas las conocidas y las pendientes de escribir"""
+
+    __slots__ = ("user_id", "answers", "dirty", "persisted")
+
+    def __init__(self, user_id: int, answers: Dict[int, str]):
+        self.user_id = user_id
+        self.answers = answers  # question_id -> answer_value (persistidas + pendientes)
+        self.dirty: Dict[int, str] = {}  # question_id -> answer_value pendientes
+        self.persisted = set(answers)  # question_id que ya tienen fila en la BD
+
+
+class _PendingAnswers(NamedTuple):
+    """Respuestas retiradas del buffer para escribir, y cuáles son filas nuevas"""
+    answers: Dict[int, str]
+    new_ids: Set[int]
+
+    @property
+    def new_count(self) -> int:
+        return len(self.new_ids)
+
+
+class DraftStore:
+    """
+    Buffer en memoria de respuestas de tests IN_PROGRESS (modo borrador).
+
+    Las respuestas se guardan en memoria y se escriben a la BD en lotes
+    (write-behind) desde una tarea en segundo plano. Los contadores de
+    respuestas se sirven desde el buffer.
+
+    El buffer es por proceso: con varios workers requiere sticky sessions.
+    """
+
+    def __init__(self, max_tests: int = 5000, batch_size: int = 500):
+        """
+        Args:
+            max_tests: Tests en memoria antes de desalojar el menos usado
+            batch_size: Filas máximas por INSERT al escribir a la BD
+        """
+        self.max_tests = max_tests
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._drafts: "OrderedDict[int, _Draft]" = OrderedDict()
+
+    def record(self, db: Session, test_id: int, user_id: int, answers: Dict[int, str]) -> int:
+        """
+        Registra respuestas de un test en el buffer.
+
+        Returns:
+            Total de preguntas respondidas del test
+
+        Raises:
+            HTTPException: 404 si el test no existe, 403 si no es del usuario,
+                           400 si ya está completado
+        """
+        draft = self._get_or_load(db, test_id)
+
+        if draft.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permiso para modificar este test"
+            )
+
+        with self._lock:
+            draft.answers.update(answers)
+            draft.dirty.update(answers)
+            total = len(draft.answers)
+
+        metrics.increment("drafts.answers_buffered", len(answers))
+        self._evict_overflow()
+
+        return total
+
+    def flush(self, test_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Escribe a la BD las respuestas pendientes (todas o solo de test_ids).
+        Las que no se pudieron escribir vuelven al buffer para el próximo flush.
+
+        Returns:
+            Número de respuestas escritas
+        """
+        pending = self._take_dirty(test_ids)
+
+        if not pending:
+            return 0
+
+        written = 0
+        unwritten = dict(pending)
+        db = SessionLocal()
+        try:
+            try:
+                written = self._write(db, pending)
+                db.commit()
+                unwritten = {}
+            except SQLAlchemyError:
+                # Un test eliminado entre medio hace fallar todo el lote: reintentar por test
+                db.rollback()
+                written = 0
+                for test_id, item in pending.items():
+                    try:
+                        written += self._write(db, {test_id: item})
+                        db.commit()
+                        del unwritten[test_id]
+                    except IntegrityError:
+                        db.rollback()
+                        if self._test_exists(db, test_id):
+                            # Otra violación (ej: una opción eliminada): conservar las respuestas
+                            logger.exception("No se pudieron guardar las respuestas del test %s", test_id)
+                            continue
+                        # El test ya no existe (eliminado desde otro worker): no tiene sentido reintentar
+                        del unwritten[test_id]
+                        self.discard(test_id)
+                        logger.warning("Respuestas descartadas del test %s: ya no existe", test_id)
+                    except SQLAlchemyError:
+                        db.rollback()
+                        logger.exception("No se pudieron guardar las respuestas del test %s", test_id)
+        finally:
+            db.close()
+            self._restore(unwritten)
+
+        metrics.increment("drafts.answers_flushed", written)
+        return written
+
+    async def run(self, interval: float) -> None:
+        """Tarea en segundo plano: escribe los pendientes cada interval segundos"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await run_in_threadpool(self.flush)
+            except Exception:
+                logger.exception("Error escribiendo respuestas en borrador")
+
+    def flush_test(self, test_id: int) -> bool:
+        """
+        Escribe sincrónicamente las respuestas pendientes de un test y lo saca del buffer.
+        Retorna False (y lo deja en el buffer) si quedaron respuestas sin escribir.
+        """
+        self.flush([test_id])
+
+        with self._lock:
+            draft = self._drafts.get(test_id)
+            if draft is not None and draft.dirty:
+                return False
+            self._drafts.pop(test_id, None)
+
+        return True
+
+    def discard(self, test_id: int) -> None:
+        """Saca un test del buffer sin escribir sus pendientes (ej: test eliminado)"""
+        with self._lock:
+            self._drafts.pop(test_id, None)
+
+    def _test_exists(self, db: Session, test_id: int) -> bool:
+        """True si el test sigue en la BD (ante un error de lectura se asume que sí)"""
+        try:
+            return db.query(Test.id).filter(Test.id == test_id).first() is not None
+        except SQLAlchemyError:
+            db.rollback()
+            return True
+
+    def _get_or_load(self, db: Session, test_id: int) -> _Draft:
+        with self._lock:
+            draft = self._drafts.get(test_id)
+            if draft is not None:
+                self._drafts.move_to_end(test_id)
+                return draft
+
+        test = db.query(Test.user_id, Test.status).filter(Test.id == test_id).first()
+
+        if not test:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test no encontrado"
+            )
+
+        if test.status != TestStatus.IN_PROGRESS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El test ya está completado"
+            )
+
+        rows = db.query(TestResponse.question_id, TestResponse.option_id, TestResponse.answer_value).filter(
+            TestResponse.test_id == test_id
+        ).all()
+        answers = {
+            row.question_id: question_catalog.decode_answer(db, row.question_id, row.option_id, row.answer_value)
+            for row in rows
+        }
+
+        with self._lock:
+            # Otro thread pudo cargarlo mientras tanto
+            draft = self._drafts.get(test_id)
+            if draft is None:
+                draft = _Draft(test.user_id, answers)
+                self._drafts[test_id] = draft
+            return draft
+
+    def _take_dirty(self, test_ids: Optional[Iterable[int]]) -> Dict[int, "_PendingAnswers"]:
+        """Retira las respuestas pendientes del buffer para escribirlas"""
+        pending = {}
+
+        with self._lock:
+            ids = list(self._drafts) if test_ids is None else test_ids
+            for test_id in ids:
+                draft = self._drafts.get(test_id)
+                if draft is not None and draft.dirty:
+                    new_ids = draft.dirty.keys() - draft.persisted
+                    pending[test_id] = _PendingAnswers(draft.dirty, new_ids)
+                    draft.persisted.update(draft.dirty)
+                    draft.dirty = {}
+
+        return pending
+
+    def _restore(self, unwritten: Dict[int, "_PendingAnswers"]) -> None:
+        """Devuelve al buffer las respuestas que no se pudieron escribir (deshace _take_dirty)"""
+        if not unwritten:
+            return
+
+        with self._lock:
+            for test_id, item in unwritten.items():
+                draft = self._drafts.get(test_id)
+                if draft is None:  # Descartado mientras tanto (ej: test eliminado)
+                    continue
+
+                for question_id, answer_value in item.answers.items():
+                    draft.dirty.setdefault(question_id, answer_value)  # Una respuesta más reciente gana
+                # Siguen sin fila las nuevas que nadie más escribió mientras tanto
+                draft.persisted -= item.new_ids & draft.dirty.keys()
+
+        metrics.increment("drafts.flush_failed", sum(len(item.answers) for item in unwritten.values()))
+
+    def _write(self, db: Session, pending: Dict[int, "_PendingAnswers"]) -> int:
+        """
+        INSERT ... ON CONFLICT DO UPDATE en lotes de batch_size filas,
+        y suma las respuestas nuevas a tests.answered_count.
+        """
+        rows = []
+        for test_id, item in pending.items():
+            for question_id, answer_value in item.answers.items():
+                option_id = question_catalog.encode_answer(db, question_id, answer_value)
+                rows.append({
+                    "test_id": test_id,
+                    "question_id": question_id,
+                    "option_id": option_id,
+                    "answer_value": answer_value if option_id is None else None
+                })
+
+        for start in range(0, len(rows), self.batch_size):
+            stmt = insert(TestResponse).values(rows[start:start + self.batch_size])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[TestResponse.test_id, TestResponse.question_id],
+                set_={"option_id": stmt.excluded.option_id, "answer_value": stmt.excluded.answer_value}
+            )
+            db.execute(stmt)
+
+        for test_id, item in pending.items():
+            if item.new_count:
+                db.execute(
+                    update(Test)
+                    .where(Test.id == test_id)
+                    .values(answered_count=Test.answered_count + item.new_count)
+                )
+
+        return len(rows)
+
+    def _evict_overflow(self) -> None:
+        """Desaloja los tests menos usados si se supera max_tests (escribiendo sus pendientes)"""
+        evicted: List[int] = []
+
+        with self._lock:
+            overflow = len(self._drafts) - self.max_tests
+            evicted = list(self._drafts)[:max(overflow, 0)]
+
+        for test_id in evicted:
+            if self.flush_test(test_id):  # Si no se pudo escribir se queda hasta el próximo flush
+                metrics.increment("drafts.evicted")
+
+
+# Instancia global del buffer
+draft_store = DraftStore(
+    max_tests=settings.DRAFT_MAX_TESTS,
+    batch_size=settings.DRAFT_FLUSH_BATCH_SIZE
+)
@@ -0,0 +1,87 @@
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.services.question_catalog import QuestionCatalog, question_catalog
+
+
+# Datos demográficos del test que acompañan a las respuestas en el payload del ML
+DEMOGRAPHIC_FEATURES = ("ciclo", "genero", "facultad", "practicasprepro")
+
+
+class FeatureSchema:
+    """
+    Orden de las features del modelo ML, compilado desde las preguntas activas.
+
+    Es inmutable: cuando cambian las preguntas (en este u otro worker) se
+    compila uno nuevo con la versión siguiente del catálogo.
+    """
+
+    __slots__ = ("version", "question_keys")
+
+    def __init__(self, version: Tuple[Optional[int], int], question_keys: Tuple[str, ...]):
+        self.version = version  # (versión compartida, versión local) del catálogo
+        self.question_keys = question_keys  # Preguntas activas, en orden
+
+    @property
+    def expected_responses(self) -> int:
+        return len(self.question_keys)
+
+    def build_payload(self, test_data: Dict[str, Any], responses: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Arma el payload del ML como dict plano: {"respuestas": {ciclo, ..., pregunta1, ...}}.
+        Las preguntas sin respuesta van como "".
+        """
+        features = {key: test_data[key] for key in DEMOGRAPHIC_FEATURES}
+
+        for key in self.question_keys:
+            features[key] = responses.get(key, "")
+
+        return {"respuestas": features}
+
+    def missing_keys(self, responses: Dict[str, str]) -> List[str]:
+        """Preguntas activas que no están en responses"""
+        return [key for key in self.question_keys if key not in responses]
+
+
+class FeatureSchemaCache:
+    """
+    Mantiene el FeatureSchema compilado de la versión actual del catálogo.
+
+    La versión incluye la compartida entre procesos (cache_versions), así
+    un cambio de preguntas hecho en otro worker también recompila el schema.
+    """
+
+    def __init__(self, catalog: QuestionCatalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._schema: Optional[FeatureSchema] = None
+
+    def get(self, db: Session) -> FeatureSchema:
+        """Retorna el schema vigente, recompilándolo si cambiaron las preguntas"""
+        # Versión antes y después de get_questions, que revisa la compartida y
+        # puede recargar. El schema nuevo lleva la de antes: si hubo una recarga
+        # concurrente, se vuelve a compilar en la siguiente llamada.
+        version = self._version()
+        questions = self.catalog.get_questions(db)
+
+        schema = self._schema
+
+        if schema is not None and schema.version == self._version():
+            return schema
+
+        active = sorted((q for q in questions.values() if q.active), key=lambda q: q.order)
+        schema = FeatureSchema(version, tuple(q.question_key for q in active))
+
+        with self._lock:
+            self._schema = schema
+
+        return schema
+
+    def _version(self) -> Tuple[Optional[int], int]:
+        return (self.catalog.shared.seen, self.catalog.version)
+
+
+# Instancia global
+feature_schemas = FeatureSchemaCache(question_catalog)
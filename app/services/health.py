@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import engine
+from app.services.ml_service import MLService, ml_service
+from app.services.question_catalog import question_catalog
+from app.services.recommendation_catalog import recommendation_catalog
+from app.utils.loop_monitor import loop_monitor
+from app.utils.readiness import readiness
+
+
+logger = logging.getLogger(__name__)
+
+
+class HealthChecker:
+    """
+    Chequeos de readiness con sus tiempos, para que el balanceador saque
+    de rotación a los workers con el pool de BD, el enlace al ML o el
+    event loop degradados.
+
+    El ML se sondea en segundo plano cada probe_interval segundos; las
+    peticiones a /health/ready solo leen el último resultado. Salvo con
+    ml_required, un ML caído deja el worker en rotación y solo se reporta
+    como degradado (sacar todos los workers no ayudaría a nadie).
+    """
+
+    def __init__(
+        self,
+        ml: MLService,
+        probe_interval: float = 15.0,
+        probe_timeout: float = 3.0,
+        check_timeout: float = 2.0,
+        db_max_latency_ms: float = 500.0,
+        loop_max_lag_ms: float = 200.0,
+        ml_required: bool = False
+    ):
+        self.ml = ml
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.check_timeout = check_timeout
+        self.db_max_latency_ms = db_max_latency_ms
+        self.loop_max_lag_ms = loop_max_lag_ms
+        self.ml_required = ml_required
+        self._ml_probe: Dict[str, Any] = {"ok": None, "latency_ms": None, "checked_at": None, "error": None}
+
+    async def run_ml_probe(self) -> None:
+        """Sondea el servicio ML indefinidamente (tarea de fondo del startup)"""
+        while True:
+            await self.probe_ml()
+            await asyncio.sleep(self.probe_interval)
+
+    async def probe_ml(self) -> None:
+        started = time.perf_counter()
+        try:
+            await self.ml.ping(self.probe_timeout)
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, f"Servicio ML no alcanzable: {type(e).__name__}: {e}"[:255]
+            logger.warning(error)
+
+        self._ml_probe = {
+            "ok": ok,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+            "checked_at": time.time(),
+            "error": error,
+        }
+
+    async def check(self) -> Dict[str, Any]:
+        """
+        Ejecuta los chequeos y retorna:
+        {"ready", "reason", "degraded", "duration_ms", "checks": {warm_up, database, ml_service, event_loop}}
+
+        degraded lista los chequeos fallidos, incluidos los que no afectan a ready.
+        """
+        started = time.perf_counter()
+
+        checks = {
+            "warm_up": self._check_warm_up(),
+            "event_loop": await self._check_event_loop(),
+            "database": await self._check_database(),
+            "ml_service": self._check_ml_service(),
+        }
+
+        degraded = [name for name, check in checks.items() if check["ok"] is False]
+
+        reason = None
+        for name in degraded:
+            if name != "ml_service" or self.ml_required:
+                reason = checks[name].get("error") or f"{name} degradado"
+                break
+
+        return {
+            "ready": reason is None,
+            "reason": reason,
+            "degraded": degraded,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "checks": checks,
+        }
+
+    def _check_warm_up(self) -> Dict[str, Any]:
+        state = readiness.snapshot()
+
+        return {
+            "ok": state["ready"],
+            "error": state["reason"],
+            "question_catalog": question_catalog.loaded,
+            "recommendation_catalog": recommendation_catalog.loaded,
+        }
+
+    async def _check_event_loop(self) -> Dict[str, Any]:
+        """
+        Lag del loop: cuánto tarda en ejecutarse un callback recién encolado,
+        más la última muestra del loop_monitor y la ocupación del threadpool.
+        """
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        scheduled = time.perf_counter()
+
+        loop.call_soon(lambda: done.done() or done.set_result(time.perf_counter() - scheduled))
+        lag_ms = round(await done * 1000, 2)
+
+        sampled = loop_monitor.snapshot()
+        worst_ms = max(lag_ms, sampled.get("lag_ms", 0.0))
+
+        return {
+            "ok": worst_ms <= self.loop_max_lag_ms,
+            "lag_ms": lag_ms,
+            "error": None if worst_ms <= self.loop_max_lag_ms else f"Lag del event loop: {worst_ms} ms",
+            **sampled,
+        }
+
+    async def _check_database(self) -> Dict[str, Any]:
+        """Latencia de obtener una conexión del pool (incluye el pre-ping)"""
+        started = time.perf_counter()
+        error = None
+
+        try:
+            await asyncio.wait_for(run_in_threadpool(_checkout_connection), timeout=self.check_timeout)
+        except asyncio.TimeoutError:
+            error = f"Sin conexión del pool en {self.check_timeout} s"
+        except Exception as e:
+            error = f"Base de datos: {type(e).__name__}"
+
+        latency_ms = round((time.perf_counter() - started) * 1000, 2)
+        if error is None and latency_ms > self.db_max_latency_ms:
+            error = f"Latencia del pool de BD: {latency_ms} ms"
+
+        pool = engine.pool
+        return {
+            "ok": error is None,
+            "latency_ms": latency_ms,
+            "error": error,
+            "pool": {
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else None,
+                "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            },
+        }
+
+    def _check_ml_service(self) -> Dict[str, Any]:
+        probe = self._ml_probe
+        checked_at: Optional[float] = probe["checked_at"]
+
+        return {
+            "ok": probe["ok"],  # None: todavía no se sondeó
+            "latency_ms": probe["latency_ms"],
+            "age_seconds": round(time.time() - checked_at, 1) if checked_at else None,
+            "error": probe["error"],
+            "required": self.ml_required,
+        }
+
+
+def _checkout_connection() -> None:
+    with engine.connect():
+        pass
+
+
+# Instancia global
+health_checker = HealthChecker(
+    ml_service,
+    probe_interval=settings.ML_PROBE_INTERVAL_SECONDS,
+    probe_timeout=settings.ML_PROBE_TIMEOUT_SECONDS,
+    check_timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+    db_max_latency_ms=settings.HEALTH_DB_MAX_LATENCY_MS,
+    loop_max_lag_ms=settings.HEALTH_LOOP_MAX_LAG_MS,
+    ml_required=settings.HEALTH_ML_REQUIRED
+)
@@ -1,10 +1,19 @@
-import httpx
-from typing import Dict, Any
+import asyncio
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Sequence, Union
 from fastapi import HTTPException, status
 
-from app.schemas.test_result import MLPredictionRequest, MLPredictionResponse, QuestionResponses
+from app.models.enums import PredictionResult
+from app.schemas.test_result import MLPredictionResponse
+from app.services.feature_schema import FeatureSchema
 from app.config import settings
 
+if TYPE_CHECKING:
+    import httpx  # Se importa en el primer uso (start/predict): acorta el arranque en frío
+
+
+# Payload del servicio ML: {"respuestas": {ciclo, genero, ..., pregunta1, ...}}
+MLPayload = Dict[str, Any]
+
 
 class MLService:
     """Servicio para comunicarse con el modelo ML externo"""
@@ -21,13 +30,28 @@ class MLService:
         self.base_url = base_url or getattr(settings, 'ML_SERVICE_URL', 'https://burnoutml.onrender.com')
         self.timeout = timeout
         self.prediction_endpoint = f"{self.base_url}/predict"
+        self._client: Optional["httpx.AsyncClient"] = None  # Cliente compartido (start/close)
+    
+    async def start(self) -> None:
+        """Crea el cliente HTTP compartido (conexiones reutilizadas entre predicciones)"""
+        import httpx
+        
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+    
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
-    async def predict(self, data: MLPredictionRequest) -> MLPredictionResponse:
+    async def predict(self, data: MLPayload, client: Optional["httpx.AsyncClient"] = None) -> MLPredictionResponse:
         """
         Envía datos al servicio ML y obtiene la predicción.
         
         Args:
             data: Datos del test en formato esperado por el ML
+            client: Cliente HTTP (opcional); por defecto el compartido de start(),
+                    o uno por llamada si no se llamó a start()
         
         Returns:
             Respuesta del ML con predicción, probabilidad y versión del modelo
@@ -35,24 +59,16 @@ class MLService:
         Raises:
             HTTPException: Si hay error en la comunicación o el ML falla
         """
+        import httpx
+        
+        client = client or self._client
+        
         try:
+            if client is not None:
+                return await self._post(client, data)
+            
             async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    self.prediction_endpoint,
-                    json=data.model_dump(),
-                    headers={"Content-Type": "application/json"}
-                )
-                
-                # Verificar respuesta exitosa
-                response.raise_for_status()
-                
-                # Parsear respuesta
-                ml_response = response.json()
-                
-                print(self.base_url)
-                
-                # Validar estructura de respuesta
-                return MLPredictionResponse(**ml_response)
+                return await self._post(client, data)
         
         except httpx.TimeoutException:
             raise HTTPException(
@@ -78,51 +94,89 @@ class MLService:
                 detail=f"Error inesperado en la predicción: {str(e)}"
             )
     
-    def build_prediction_request(self, test_data: Dict[str, Any], responses: Dict[str, str]) -> MLPredictionRequest:
+    async def predict_many(
+        self,
+        requests: Sequence[MLPayload],
+        concurrency: int = 8
+    ) -> List[Union[MLPredictionResponse, HTTPException]]:
+        """
+        Obtiene predicciones para muchos tests con un único cliente HTTP
+        y como máximo `concurrency` peticiones en vuelo.
+        
+        El servicio ML no tiene endpoint por lotes: se envía una petición por test.
+        
+        Returns:
+            Una predicción por request, en el mismo orden; las que fallaron
+            quedan como la HTTPException correspondiente
+        """
+        import httpx
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        
+        async with httpx.AsyncClient(timeout=self.timeout, limits=limits) as client:
+            async def predict_one(data: MLPayload):
+                async with semaphore:
+                    try:
+                        return await self.predict(data, client=client)
+                    except HTTPException as e:
+                        return e
+            
+            return await asyncio.gather(*(predict_one(data) for data in requests))
+    
+    async def ping(self, timeout: float) -> None:
+        """
+        Verifica que el servicio ML sea alcanzable (cualquier respuesta HTTP cuenta).
         
+        Raises:
+            httpx.RequestError: Si no hay conexión o se excede el timeout
         """
-        Construye el objeto de request para el ML a partir de datos del test.
+        import httpx
+        
+        if self._client is not None:
+            await self._client.get(self.base_url, timeout=timeout)
+            return
+        
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            await client.get(self.base_url)
+    
+    async def _post(self, client: "httpx.AsyncClient", data: MLPayload) -> MLPredictionResponse:
+        response = await client.post(
+            self.prediction_endpoint,
+            json=data,
+            headers={"Content-Type": "application/json"}
+        )
+        
+        # Verificar respuesta exitosa
+        response.raise_for_status()
+        
+        # Validar estructura de respuesta
+        return MLPredictionResponse(**response.json())
+    
+    def build_prediction_request(
+        self,
+        test_data: Dict[str, Any],
+        responses: Dict[str, str],
+        feature_schema: FeatureSchema
+    ) -> MLPayload:
+        """
+        Construye el payload para el ML a partir de datos del test.
         
         Args:
             test_data: Datos demográficos del test (ciclo, genero, facultad, practicasprepro)
             responses: Diccionario con las respuestas {question_key: answer_value}
                        ej: {"pregunta1": "A menudo", "pregunta2": "Rara vez", ...}
+            feature_schema: Orden de features compilado desde las preguntas activas
         
         Returns:
-            MLPredictionRequest listo para enviar al servicio ML
+            Payload (dict) listo para enviar al servicio ML
         """
-        
-        question_data = {
-            "ciclo":test_data["ciclo"],
-            "genero":test_data["genero"],
-            "facultad":test_data["facultad"],
-            "practicasprepro":test_data["practicasprepro"],
-            "pregunta1":responses.get("pregunta1", ""),
-            "pregunta2":responses.get("pregunta2", ""),
-            "pregunta3":responses.get("pregunta3", ""),
-            "pregunta4":responses.get("pregunta4", ""),
-            "pregunta5":responses.get("pregunta5", ""),
-            "pregunta6":responses.get("pregunta6", ""),
-            "pregunta7":responses.get("pregunta7", ""),
-            "pregunta8":responses.get("pregunta8", ""),
-            "pregunta9":responses.get("pregunta9", ""),
-            "pregunta10":responses.get("pregunta10", ""),
-            "pregunta11":responses.get("pregunta11", ""),
-            "pregunta12":responses.get("pregunta12", ""),
-            "pregunta13":responses.get("pregunta13", ""),
-            "pregunta14":responses.get("pregunta14", ""),
-            "pregunta15":responses.get("pregunta15", ""),
-            "pregunta16":responses.get("pregunta16", ""),
-            "pregunta17":responses.get("pregunta17", ""),
-            "pregunta18":responses.get("pregunta18", ""),
-            "pregunta19":responses.get("pregunta19", "")
-        }
-        
-        question_responses_obj = QuestionResponses(**question_data)
-        
-        return MLPredictionRequest(
-            respuestas=question_responses_obj
-        )
+        return feature_schema.build_payload(test_data, responses)
+
+
+def to_prediction_result(response: MLPredictionResponse) -> PredictionResult:
+    """Convierte el resultado del ML ("SI"/otro) al enum guardado en la BD"""
+    return PredictionResult.S if response.resultado == "SI" else PredictionResult.N
 
 
 # Instancia global del servicio
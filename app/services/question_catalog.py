@@ -0,0 +1,185 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.models.question import Question, QuestionOption
+from app.schemas.test import TestResponseSubmit
+from app.services.cache_versions import SharedVersion, question_versions
+
+
+class QuestionInfo(NamedTuple):
+    """Datos de una pregunta necesarios para armar respuestas y validarlas"""
+    id: int
+    question_key: str
+    question_text: str
+    order: int
+    active: bool
+    option_ids: Dict[str, int]  # option_value -> option_id (respuestas permitidas)
+    option_values: Dict[int, str]  # option_id -> option_value
+
+
+class QuestionCatalog:
+    """
+    Mapa en memoria del cuestionario (question_id -> pregunta y opciones).
+
+    Las preguntas cambian muy poco, así que se cargan una vez y se
+    invalidan desde las operaciones de escritura de crud/questions.py
+    (preguntas y opciones); los demás workers lo recargan al ver cambiar
+    la versión compartida.
+    """
+
+    def __init__(self, shared: SharedVersion):
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._questions: Optional[Dict[int, QuestionInfo]] = None
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._questions is not None
+
+    def get_questions(self, db: Session) -> Dict[int, QuestionInfo]:
+        """Retorna el mapa de preguntas, cargándolo si no está en memoria"""
+        questions = self._questions
+
+        if questions is not None and self.shared.changed(db):
+            # Otro worker modificó preguntas u opciones
+            self._discard()
+            questions = None
+
+        if questions is None:
+            questions = self.load(db)
+
+        return questions
+
+    def load(self, db: Session) -> Dict[int, QuestionInfo]:
+        """Carga todas las preguntas (activas e inactivas) y sus opciones"""
+        with self._lock:
+            version = self.version
+
+        self.shared.mark_loaded(db)
+
+        rows = db.query(
+            Question.id,
+            Question.question_key,
+            Question.question_text,
+            Question.order,
+            Question.active
+        ).all()
+
+        option_values = defaultdict(dict)
+        options = db.query(QuestionOption.id, QuestionOption.question_id, QuestionOption.option_value)
+        for option_id, question_id, option_value in options:
+            option_values[question_id][option_id] = option_value
+
+        questions = {
+            row.id: QuestionInfo(
+                *row,
+                option_ids={value: option_id for option_id, value in option_values[row.id].items()},
+                option_values=option_values[row.id]
+            )
+            for row in rows
+        }
+
+        with self._lock:
+            # Si hubo una invalidación mientras se cargaba, no guardar datos viejos
+            if version == self.version:
+                self._questions = questions
+
+        return questions
+
+    def validate_answers(self, db: Session, responses: Iterable[TestResponseSubmit]) -> None:
+        """
+        Valida un lote de respuestas contra el catálogo, sin consultar la BD.
+
+        Raises:
+            HTTPException: 404 si una pregunta no existe,
+                           400 si un answer_value no es una opción de su pregunta
+        """
+        responses = list(responses)
+        questions = self.get_questions(db)
+
+        # Pregunta u opción creada en otro worker: recargar una vez antes de rechazar
+        if any(not self._is_known(questions, response) for response in responses):
+            questions = self.load(db)
+
+        for response in responses:
+            question = questions.get(response.question_id)
+
+            if question is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Pregunta no encontrada"
+                )
+
+            # Preguntas sin opciones aceptan texto libre
+            if question.option_ids and response.answer_value not in question.option_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Respuesta inválida para '{question.question_key}': '{response.answer_value}'"
+                )
+
+    @staticmethod
+    def _is_known(questions: Dict[int, QuestionInfo], response: TestResponseSubmit) -> bool:
+        question = questions.get(response.question_id)
+
+        if question is None:
+            return False
+
+        return not question.option_ids or response.answer_value in question.option_ids
+
+    def encode_answer(self, db: Session, question_id: int, answer_value: str) -> Optional[int]:
+        """
+        Retorna el option_id de una respuesta, o None si la pregunta es de
+        texto libre (en ese caso se guarda answer_value tal cual).
+        """
+        question = self.get_questions(db).get(question_id)
+
+        if question is None:
+            question = self.load(db).get(question_id)
+
+        if question is None:
+            return None
+
+        return question.option_ids.get(answer_value)
+
+    def decode_answer(
+        self,
+        db: Session,
+        question_id: int,
+        option_id: Optional[int],
+        answer_value: Optional[str]
+    ) -> Optional[str]:
+        """Retorna el texto de una respuesta guardada (option_id o texto libre)"""
+        if option_id is None:
+            return answer_value
+
+        question = self.get_questions(db).get(question_id)
+
+        # Opción creada en otro worker: recargar una vez
+        if question is None or option_id not in question.option_values:
+            question = self.load(db).get(question_id)
+
+        return question.option_values.get(option_id) if question else answer_value
+
+    def invalidate(self, db: Optional[Session] = None) -> None:
+        """
+        Descarta el mapa actual; se recarga en el siguiente acceso.
+        Con db (después del commit de una escritura) invalida también el de los demás workers.
+        """
+        self._discard()
+
+        if db is not None:
+            self.shared.bump(db)
+
+    def _discard(self) -> None:
+        with self._lock:
+            self._questions = None
+            self.version += 1
+
+
+# Instancia global del catálogo
+question_catalog = QuestionCatalog(question_versions)
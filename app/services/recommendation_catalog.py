@@ -0,0 +1,87 @@
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.recommendation import Recommendation
+from app.schemas.test_result import RecommendationResponse
+from app.services.cache_versions import SharedVersion, recommendation_versions
+
+
+class RecommendationCatalog:
+    """
+    Recomendaciones activas en memoria, agrupadas por tipo de predicción.
+
+    Se invalida desde las operaciones de escritura de crud/recommendations.py;
+    los demás workers lo recargan al ver cambiar la versión compartida.
+    """
+
+    def __init__(self, shared: SharedVersion):
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._by_polarity: Optional[Dict[bool, List[RecommendationResponse]]] = None
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._by_polarity is not None
+
+    def get_for_prediction(self, db: Session, for_positive_result: bool) -> List[RecommendationResponse]:
+        """
+        Retorna las recomendaciones activas para un tipo de predicción.
+
+        Args:
+            for_positive_result: True para predicción "S", False para "N"
+        """
+        by_polarity = self._by_polarity
+
+        if by_polarity is not None and self.shared.changed(db):
+            # Otro worker modificó las recomendaciones
+            self._discard()
+            by_polarity = None
+
+        if by_polarity is None:
+            by_polarity = self.load(db)
+
+        return by_polarity[for_positive_result]
+
+    def load(self, db: Session) -> Dict[bool, List[RecommendationResponse]]:
+        """Carga las recomendaciones activas de ambos tipos en una sola consulta"""
+        with self._lock:
+            version = self.version
+
+        self.shared.mark_loaded(db)
+
+        recommendations = db.query(Recommendation).filter(
+            Recommendation.active == True
+        ).order_by(Recommendation.id).all()
+
+        by_polarity: Dict[bool, List[RecommendationResponse]] = {True: [], False: []}
+        for rec in recommendations:
+            by_polarity[rec.for_positive_result].append(RecommendationResponse.model_validate(rec))
+
+        with self._lock:
+            # Si hubo una invalidación mientras se cargaba, no guardar datos viejos
+            if version == self.version:
+                self._by_polarity = by_polarity
+
+        return by_polarity
+
+    def invalidate(self, db: Optional[Session] = None) -> None:
+        """
+        Descarta el catálogo actual; se recarga en el siguiente acceso.
+        Con db (después del commit de una escritura) invalida también el de los demás workers.
+        """
+        self._discard()
+
+        if db is not None:
+            self.shared.bump(db)
+
+    def _discard(self) -> None:
+        with self._lock:
+            self._by_polarity = None
+            self.version += 1
+
+
+# Instancia global del catálogo
+recommendation_catalog = RecommendationCatalog(recommendation_versions)
@@ -0,0 +1,292 @@
+import logging
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, update, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.crud import tests as crud_tests
+from app.database import SessionLocal
+from app.models.enums import TestStatus
+from app.models.rescore_checkpoint import RescoreCheckpoint, RescoreFailure
+from app.models.shadow_test_result import ShadowTestResult
+from app.models.test import Test
+from app.models.test_result import TestResult
+from app.schemas.test_result import MLPredictionResponse
+from app.services.cache_versions import result_versions
+from app.services.feature_schema import feature_schemas
+from app.services.ml_service import MLService, to_prediction_result
+from app.utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+RESCORE_MODES = ("shadow", "replace")
+
+
+class RescoreStats(NamedTuple):
+    """Resumen de una ejecución de rescore"""
+    processed: int
+    failed: int
+    last_test_id: int
+    tests_per_second: float
+
+
+class RescoringJob:
+    """
+    Vuelve a puntuar los tests completados con el modelo ML actual (o uno candidato).
+
+    - Recorre los tests por rangos de id y guarda un checkpoint por bloque
+      (en la misma transacción que los resultados), así se puede reanudar
+      con el mismo job_name después de una interrupción.
+    - Las predicciones de un bloque se piden con concurrencia acotada y un
+      único cliente HTTP (MLService.predict_many).
+    - mode="shadow" escribe en shadow_test_results; mode="replace" reescribe
+      test_results y reasigna recomendaciones si cambió la predicción.
+    - Los tests cuya predicción falla se guardan en rescore_failures y se
+      reintentan al volver a ejecutar el mismo job_name.
+    - En modo replace, cada bloque incrementa result_versions para que los
+      workers web dejen de servir el resultado anterior desde su cache.
+    """
+
+    def __init__(
+        self,
+        job_name: str,
+        ml: MLService,
+        mode: str = "shadow",
+        chunk_size: int = 500,
+        concurrency: int = 8
+    ):
+        if mode not in RESCORE_MODES:
+            raise ValueError(f"Modo inválido: {mode} (opciones: {', '.join(RESCORE_MODES)})")
+
+        self.job_name = job_name
+        self.ml = ml
+        self.mode = mode
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+
+    async def run(self, max_tests: Optional[int] = None) -> RescoreStats:
+        """
+        Ejecuta (o reanuda) el trabajo hasta terminar o procesar max_tests.
+        Antes de avanzar reintenta los tests que fallaron en ejecuciones previas.
+
+        Raises:
+            ValueError: Si el job_name ya existe con otro modo
+        """
+        db = SessionLocal()
+        try:
+            checkpoint = self._get_checkpoint(db)
+            started = time.monotonic()
+            processed = failed = 0
+
+            def remaining() -> int:
+                return self.chunk_size if max_tests is None else min(self.chunk_size, max_tests - processed - failed)
+
+            retry_ids = self._get_failed_ids(db)
+
+            while retry_ids and remaining() > 0:
+                chunk_ids, retry_ids = retry_ids[:remaining()], retry_ids[remaining():]
+                tests = self._fetch_tests(db, Test.id.in_(chunk_ids))
+                chunk_processed, chunk_failed = await self._rescore_chunk(db, checkpoint, tests, retry=True)
+                processed += chunk_processed
+                failed += chunk_failed
+                self._log_progress(checkpoint, processed, failed, started)
+
+            while remaining() > 0:
+                tests = self._fetch_tests(db, Test.id > checkpoint.last_test_id, limit=remaining())
+                if not tests:
+                    break
+
+                chunk_processed, chunk_failed = await self._rescore_chunk(db, checkpoint, tests, retry=False)
+                processed += chunk_processed
+                failed += chunk_failed
+                self._log_progress(checkpoint, processed, failed, started)
+
+            elapsed = max(time.monotonic() - started, 1e-9)
+            return RescoreStats(processed, failed, checkpoint.last_test_id, round((processed + failed) / elapsed, 2))
+        finally:
+            db.close()
+
+    async def _rescore_chunk(self, db: Session, checkpoint: RescoreCheckpoint, tests: List, retry: bool) -> Tuple[int, int]:
+        """
+        Puntúa un bloque y guarda resultados, fallos y checkpoint en una transacción.
+        Retorna (puntuados, fallidos).
+        """
+        if not tests:
+            return 0, 0
+
+        feature_schema = feature_schemas.get(db)
+        responses = crud_tests.get_responses_as_dicts(
+            db, tests[0].id, tests[-1].id, [test.id for test in tests] if retry else None
+        )
+        requests = [
+            self.ml.build_prediction_request(
+                {
+                    "ciclo": test.ciclo,
+                    "genero": test.genero,
+                    "facultad": test.facultad,
+                    "practicasprepro": test.practicasprepro
+                },
+                responses.get(test.id, {}),
+                feature_schema
+            )
+            for test in tests
+        ]
+
+        # No dejar la transacción de lectura abierta mientras se espera al ML
+        db.rollback()
+
+        predictions = await self.ml.predict_many(requests, concurrency=self.concurrency)
+        scored = []
+        failed_ids = []
+        for test, prediction in zip(tests, predictions):
+            if isinstance(prediction, MLPredictionResponse):
+                scored.append((test, prediction))
+            else:
+                failed_ids.append(test.id)
+
+        if self.mode == "shadow":
+            self._write_shadow(db, scored)
+        else:
+            self._write_replace(db, scored)
+
+        self._record_failures(db, [test.id for test, _ in scored], failed_ids)
+
+        if not retry:
+            checkpoint.last_test_id = tests[-1].id
+        checkpoint.processed += len(scored)
+        checkpoint.failed = db.query(func.count(RescoreFailure.test_id)).filter(
+            RescoreFailure.job_name == self.job_name
+        ).scalar()
+        db.commit()
+
+        if self.mode == "replace" and scored:
+            # Los workers web vacían su result_cache al ver la nueva versión
+            for test, _ in scored:
+                crud_tests.result_cache.pop(test.id)
+            result_versions.bump(db)
+
+        metrics.increment("rescore.processed", len(scored))
+        metrics.increment("rescore.failed", len(failed_ids))
+
+        return len(scored), len(failed_ids)
+
+    def _log_progress(self, checkpoint: RescoreCheckpoint, processed: int, failed: int, started: float) -> None:
+        throughput = (processed + failed) / max(time.monotonic() - started, 1e-9)
+
+        metrics.set_gauge("rescore.tests_per_second", round(throughput, 2))
+        logger.info(
+            "Rescore %s: hasta test %s, %s ok, %s fallidos (%.1f tests/s)",
+            self.job_name, checkpoint.last_test_id, processed, failed, throughput
+        )
+
+    def _get_checkpoint(self, db: Session) -> RescoreCheckpoint:
+        checkpoint = db.query(RescoreCheckpoint).filter(RescoreCheckpoint.job_name == self.job_name).first()
+
+        if checkpoint is None:
+            checkpoint = RescoreCheckpoint(job_name=self.job_name, mode=self.mode, last_test_id=0, processed=0, failed=0)
+            db.add(checkpoint)
+            db.commit()
+        elif checkpoint.mode != self.mode:
+            raise ValueError(f"El trabajo '{self.job_name}' se creó en modo {checkpoint.mode}")
+
+        return checkpoint
+
+    def _get_failed_ids(self, db: Session) -> List[int]:
+        rows = db.query(RescoreFailure.test_id).filter(
+            RescoreFailure.job_name == self.job_name
+        ).order_by(RescoreFailure.test_id).all()
+        return [row.test_id for row in rows]
+
+    def _record_failures(self, db: Session, scored_ids: List[int], failed_ids: List[int]) -> None:
+        """Registra los tests fallidos del bloque y quita los que ya se puntuaron"""
+        if scored_ids:
+            db.execute(delete(RescoreFailure).where(
+                RescoreFailure.job_name == self.job_name,
+                RescoreFailure.test_id.in_(scored_ids)
+            ))
+
+        if failed_ids:
+            stmt = insert(RescoreFailure).values([
+                {"job_name": self.job_name, "test_id": test_id} for test_id in failed_ids
+            ])
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[RescoreFailure.job_name, RescoreFailure.test_id],
+                set_={"failed_at": func.now()}
+            ))
+
+    def _fetch_tests(self, db: Session, condition, limit: Optional[int] = None):
+        return db.query(
+            Test.id,
+            Test.ciclo,
+            Test.genero,
+            Test.facultad,
+            Test.practicasprepro,
+            TestResult.id.label("result_id"),
+            TestResult.prediction
+        ).join(
+            TestResult, TestResult.test_id == Test.id
+        ).filter(
+            Test.status == TestStatus.COMPLETED,
+            condition
+        ).order_by(Test.id).limit(limit or self.chunk_size).all()
+
+    def _write_shadow(self, db: Session, scored: List[Tuple]) -> None:
+        """INSERT ... ON CONFLICT (test_id, model_version) DO UPDATE de todo el bloque"""
+        if not scored:
+            return
+
+        stmt = insert(ShadowTestResult).values([
+            {
+                "test_id": test.id,
+                "prediction": to_prediction_result(prediction),
+                "probability": prediction.probabilidad,
+                "model_version": prediction.model_version
+            }
+            for test, prediction in scored
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ShadowTestResult.test_id, ShadowTestResult.model_version],
+            set_={
+                "prediction": stmt.excluded.prediction,
+                "probability": stmt.excluded.probability,
+                "predicted_at": func.now()
+            }
+        )
+        db.execute(stmt)
+
+    def _write_replace(self, db: Session, scored: List[Tuple]) -> None:
+        """Reescribe test_results en un executemany y reasigna recomendaciones si cambió la predicción"""
+        if not scored:
+            return
+
+        results = TestResult.__table__
+        db.execute(
+            update(results)
+            .where(results.c.id == bindparam("result_id"))
+            .values(
+                prediction=bindparam("new_prediction"),
+                probability=bindparam("new_probability"),
+                model_version=bindparam("new_model_version"),
+                predicted_at=func.now()  # Cambia el ETag del resultado
+            ),
+            [
+                {
+                    "result_id": test.result_id,
+                    "new_prediction": to_prediction_result(prediction),
+                    "new_probability": prediction.probabilidad,
+                    "new_model_version": prediction.model_version
+                }
+                for test, prediction in scored
+            ]
+        )
+
+        changed = [
+            (test.result_id, to_prediction_result(prediction))
+            for test, prediction in scored
+            if to_prediction_result(prediction) != test.prediction
+        ]
+
+        crud_tests.reassign_recommendations(db, changed)
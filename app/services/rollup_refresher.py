@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from starlette.concurrency import run_in_threadpool
+
+from app.crud import analytics as crud_analytics
+from app.database import SessionLocal
+
+
+logger = logging.getLogger(__name__)
+
+
+async def run_rollup_refresher(interval_minutes: int) -> None:
+    """
+    Tarea en segundo plano: reconstruye answer_rollup cuando tiene más de
+    interval_minutes. Cada worker la ejecuta, pero solo reconstruye el
+    primero que bloquea la fila de versión con la tabla vencida (ver
+    refresh_answer_rollup_if_stale).
+    """
+    max_age = timedelta(minutes=interval_minutes)
+
+    while True:
+        try:
+            rows = await run_in_threadpool(_refresh_if_stale, max_age)
+            if rows is not None:
+                logger.info("answer_rollup reconstruida: %s filas", rows)
+        except Exception:
+            logger.exception("Error reconstruyendo answer_rollup")
+
+        await asyncio.sleep(interval_minutes * 60)
+
+
+def _refresh_if_stale(max_age: timedelta):
+    db = SessionLocal()
+    try:
+        return crud_analytics.refresh_answer_rollup_if_stale(db, max_age)
+    finally:
+        db.close()
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import random
+import time
+from typing import TYPE_CHECKING, Optional, Set
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.shadow_prediction import ShadowPrediction
+from app.schemas.test_result import MLPredictionResponse
+from app.services.ml_service import MLPayload, MLService, to_prediction_result
+from app.utils.metrics import metrics
+
+if TYPE_CHECKING:
+    import httpx
+
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowScorer:
+    """
+    Puntúa una muestra de los tests completados también con un modelo candidato.
+
+    La petición al candidato se lanza en paralelo a la del modelo actual y
+    nunca se espera en la petición del usuario: el resultado se compara y
+    se guarda en shadow_predictions desde una tarea en segundo plano.
+    """
+
+    def __init__(self, base_url: Optional[str], sample_rate: float = 0.1, timeout: float = 10.0):
+        """
+        Args:
+            base_url: URL del modelo candidato; sin URL el scorer queda desactivado
+            sample_rate: Fracción de tests (0 a 1) que se envían al candidato
+            timeout: Tiempo máximo de espera del candidato en segundos
+        """
+        self.ml = MLService(base_url=base_url, timeout=timeout) if base_url else None
+        self.sample_rate = sample_rate
+        self.timeout = timeout
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._tasks: Set[asyncio.Task] = set()  # Referencias para que el GC no las recolecte
+
+    @property
+    def enabled(self) -> bool:
+        return self.ml is not None and self.sample_rate > 0
+
+    def start(self, data: MLPayload) -> Optional[asyncio.Task]:
+        """
+        Lanza la predicción del candidato si el test cae en la muestra.
+        Retorna la tarea (o None) para pasarla luego a record().
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+
+        task = asyncio.create_task(self._predict(data))
+        self._track(task)
+        return task
+
+    def record(
+        self,
+        candidate: Optional[asyncio.Task],
+        test_id: int,
+        primary: MLPredictionResponse,
+        primary_latency_ms: float
+    ) -> None:
+        """Guarda la comparación cuando termine el candidato, sin bloquear al llamador"""
+        if candidate is None:
+            return
+
+        self._track(asyncio.create_task(self._store(candidate, test_id, primary, primary_latency_ms)))
+
+    def cancel(self, candidate: Optional[asyncio.Task]) -> None:
+        """Descarta la predicción del candidato (ej: falló el modelo actual)"""
+        if candidate is not None:
+            candidate.cancel()
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _track(self, task: asyncio.Task) -> None:
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _predict(self, data: MLPayload):
+        """Retorna (respuesta o None, latencia en ms, error o None)"""
+        import httpx
+        
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+
+        started = time.perf_counter()
+        try:
+            response = await self.ml.predict(data, client=self._client)
+            return response, (time.perf_counter() - started) * 1000, None
+        except HTTPException as e:
+            return None, (time.perf_counter() - started) * 1000, str(e.detail)[:255]
+
+    async def _store(
+        self,
+        candidate: asyncio.Task,
+        test_id: int,
+        primary: MLPredictionResponse,
+        primary_latency_ms: float
+    ) -> None:
+        try:
+            response, latency_ms, error = await candidate
+
+            row = ShadowPrediction(
+                test_id=test_id,
+                primary_prediction=to_prediction_result(primary),
+                primary_probability=primary.probabilidad,
+                primary_model_version=primary.model_version,
+                primary_latency_ms=primary_latency_ms,
+                candidate_prediction=to_prediction_result(response) if response else None,
+                candidate_probability=response.probabilidad if response else None,
+                candidate_model_version=response.model_version if response else None,
+                candidate_latency_ms=latency_ms,
+                candidate_error=error
+            )
+
+            if response is None:
+                metrics.increment("shadow.errors")
+            elif row.candidate_prediction == row.primary_prediction:
+                metrics.increment("shadow.agreements")
+            else:
+                metrics.increment("shadow.disagreements")
+
+            await run_in_threadpool(self._save, row)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("No se pudo guardar la predicción shadow del test %s", test_id)
+
+    def _save(self, row: ShadowPrediction) -> None:
+        db = SessionLocal()
+        try:
+            db.add(row)
+            db.commit()
+        finally:
+            db.close()
+
+
+# Instancia global del scorer (desactivado si no hay SHADOW_ML_SERVICE_URL)
+shadow_scorer = ShadowScorer(
+    base_url=settings.SHADOW_ML_SERVICE_URL,
+    sample_rate=settings.SHADOW_SAMPLE_RATE,
+    timeout=settings.SHADOW_TIMEOUT_SECONDS
+)
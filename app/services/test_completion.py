@@ -0,0 +1,224 @@
+import time
+from datetime import datetime
+from typing import NamedTuple, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.crud import tests as crud_tests
+from app.models.enums import TestStatus
+from app.models.test import Test
+from app.models.test_result import TestResult
+from app.schemas.test_result import MLPredictionResponse, TestResultCreate, TestResultDetailResponse, RecommendationResponse
+from app.services.draft_store import draft_store
+from app.services.feature_schema import feature_schemas
+from app.services.ml_service import MLPayload, MLService, ml_service, to_prediction_result
+from app.services.shadow_scorer import ShadowScorer, shadow_scorer
+
+
+class _Claim(NamedTuple):
+    """Complete reservado: el payload del ML, listo para puntuar sin bloqueo"""
+    ml_request: MLPayload
+
+
+class TestCompletionService:
+    """
+    Completa un test en dos transacciones cortas, con el ML en medio.
+
+    1. Bloquea la fila del test (con lock_timeout), valida, lo marca como
+       COMPLETED con scoring_started_at y confirma: el bloqueo dura solo eso.
+    2. Llama al ML sin transacción abierta.
+    3. Guarda el resultado y sus recomendaciones en un único commit.
+
+    Las partes con la BD corren en el threadpool, nunca en el event loop.
+    """
+
+    def __init__(self, ml: MLService, shadow: ShadowScorer):
+        self.ml = ml
+        self.shadow = shadow
+
+    async def complete(
+        self,
+        db: Session,
+        test_id: int,
+        user_id: int
+    ) -> TestResultDetailResponse:
+        """
+        Completa un test y retorna su resultado con recomendaciones.
+
+        Es idempotente: si el test ya tiene resultado se retorna ese; si hay
+        un complete en curso (scoring_started_at reciente) responde 409.
+
+        Raises:
+            HTTPException: 404 si no existe, 403 si no es del usuario,
+                           400 si le faltan respuestas a preguntas activas,
+                           409 si ya hay un complete en curso
+        """
+        claim = await run_in_threadpool(self._claim, db, test_id, user_id)
+
+        if isinstance(claim, TestResultDetailResponse):
+            return claim
+
+        # Modelo candidato en paralelo (si está configurado y el test cae en la muestra)
+        shadow_task = self.shadow.start(claim.ml_request)
+
+        started = time.perf_counter()
+        try:
+            ml_response = await self.ml.predict(claim.ml_request)
+        except Exception:
+            self.shadow.cancel(shadow_task)
+            await run_in_threadpool(crud_tests.release_scoring_claim, db, test_id)
+            raise
+        primary_latency_ms = (time.perf_counter() - started) * 1000
+
+        result_response = await run_in_threadpool(self._save_result, db, test_id, user_id, ml_response)
+
+        # La comparación se guarda en segundo plano, sin esperar al candidato
+        self.shadow.record(shadow_task, test_id, ml_response, primary_latency_ms)
+
+        return result_response
+
+    def _claim(self, db: Session, test_id: int, user_id: int) -> Union[_Claim, TestResultDetailResponse]:
+        """
+        Valida y reserva el test en una transacción corta.
+        Retorna el resultado existente si el test ya fue puntuado.
+        """
+        try:
+            return self._claim_locked(db, test_id, user_id)
+        except HTTPException:
+            db.rollback()  # Liberar el bloqueo antes de responder el error
+            raise
+
+    def _claim_locked(self, db: Session, test_id: int, user_id: int) -> Union[_Claim, TestResultDetailResponse]:
+        # Modo borrador: escribir las respuestas pendientes antes de puntuar
+        if settings.DRAFT_MODE and not draft_store.flush_test(test_id):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="No se pudieron guardar las respuestas. Intenta nuevamente",
+                headers={"Retry-After": str(settings.COMPLETE_RETRY_AFTER_SECONDS)}
+            )
+        
+        # Preguntas activas y orden de las features del ML
+        feature_schema = feature_schemas.get(db)
+
+        # SELECT ... FOR UPDATE con lock_timeout: solo dura hasta el commit de abajo
+        test = crud_tests.get_test_for_update(db, test_id)
+
+        if not test:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Test no encontrado"
+            )
+
+        if test.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permiso para completar este test"
+            )
+
+        now = datetime.utcnow()
+
+        if test.status == TestStatus.COMPLETED:
+            existing_result = crud_tests.get_test_result(db, test_id)
+
+            if existing_result:
+                result_response = self._existing_response(db, existing_result)
+                db.rollback()  # Liberar el bloqueo
+                return result_response
+
+            claimed_at = test.scoring_started_at
+            if claimed_at is not None and (now - claimed_at).total_seconds() < settings.COMPLETE_CLAIM_SECONDS:
+                db.rollback()
+                crud_tests.raise_test_in_progress()
+
+            # Completado sin resultado (falló un intento anterior): se vuelve a puntuar
+        else:
+            crud_tests.complete_test(db, test, expected_responses=feature_schema.expected_responses)
+
+        # Preparar datos para ML
+        test_data = {
+            "ciclo": test.ciclo,
+            "genero": test.genero,
+            "facultad": test.facultad,
+            "practicasprepro": test.practicasprepro
+        }
+
+        responses_dict = crud_tests.get_test_responses_as_dict(db, test_id)
+
+        # answered_count también cuenta respuestas a preguntas desactivadas
+        missing = feature_schema.missing_keys(responses_dict)
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Faltan respuestas para: {', '.join(missing)}"
+            )
+
+        ml_request = self.ml.build_prediction_request(test_data, responses_dict, feature_schema)
+
+        test.scoring_started_at = now
+        db.commit()  # Libera el bloqueo antes de llamar al ML
+
+        return _Claim(ml_request)
+
+    def _save_result(
+        self,
+        db: Session,
+        test_id: int,
+        user_id: int,
+        ml_response: MLPredictionResponse
+    ) -> TestResultDetailResponse:
+        """Guarda resultado, recomendaciones y libera la reserva en un único commit"""
+        try:
+            result = crud_tests.create_test_result(db, TestResultCreate(
+                test_id=test_id,
+                prediction=to_prediction_result(ml_response),
+                probability=ml_response.probabilidad,
+                model_version=ml_response.model_version
+            ))
+        except IntegrityError:
+            # Otro worker guardó el resultado primero (unique test_id): se retorna ese
+            db.rollback()
+            result_response = self._existing_response(db, crud_tests.get_test_result(db, test_id))
+            db.rollback()
+            return result_response
+
+        recommendations = crud_tests.assign_recommendations(db, result.id, result.prediction)
+
+        db.execute(update(Test).where(Test.id == test_id).values(scoring_started_at=None))
+        db.commit()
+
+        result_response = TestResultDetailResponse(
+            id=result.id,
+            test_id=result.test_id,
+            prediction=result.prediction,
+            probability=result.probability,
+            model_version=result.model_version,
+            predicted_at=result.predicted_at,
+            recommendations=recommendations
+        )
+
+        crud_tests.cache_test_result(user_id, result_response)
+
+        return result_response
+
+    def _existing_response(self, db: Session, result: TestResult) -> TestResultDetailResponse:
+        """Arma la respuesta de un resultado ya guardado (complete duplicado)"""
+        recommendations = crud_tests.get_result_recommendations(db, result.id)
+
+        return TestResultDetailResponse(
+            id=result.id,
+            test_id=result.test_id,
+            prediction=result.prediction,
+            probability=result.probability,
+            model_version=result.model_version,
+            predicted_at=result.predicted_at,
+            recommendations=[RecommendationResponse.model_validate(rec) for rec in recommendations]
+        )
+
+
+# Instancia global del servicio
+test_completion_service = TestCompletionService(ml_service, shadow_scorer)
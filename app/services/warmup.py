@@ -0,0 +1,81 @@
+import asyncio
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.services.feature_schema import feature_schemas
+from app.services.ml_service import ml_service
+from app.services.question_catalog import question_catalog
+from app.services.recommendation_catalog import recommendation_catalog
+from app.utils.migrations import pending_migrations, schema_drift
+from app.utils.readiness import readiness
+
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up() -> bool:
+    """
+    Prepara el worker antes de marcarlo como listo:
+    1. Verifica que no haya migraciones pendientes ni columnas de los modelos
+       que falten en la BD (consultas de lectura, sin DDL)
+    2. Abre DB_POOL_SIZE conexiones del pool
+    3. Crea el cliente HTTP compartido del servicio ML
+    4. Carga los catálogos de preguntas y recomendaciones y el feature schema
+
+    Retorna True si el worker quedó listo.
+    """
+    try:
+        pending = await run_in_threadpool(pending_migrations, engine)
+        if pending:
+            readiness.set_not_ready(f"Migraciones pendientes: {', '.join(pending)}")
+            logger.error("Migraciones pendientes: %s (ejecutar python -m app.commands.migrate)", ", ".join(pending))
+            return False
+
+        missing = await run_in_threadpool(schema_drift, engine)
+        if missing:
+            readiness.set_not_ready(f"Esquema de la BD desactualizado, faltan: {', '.join(missing)}")
+            logger.error("Faltan en la BD: %s (revisar migrations/ y schema_migrations)", ", ".join(missing))
+            return False
+
+        await run_in_threadpool(_open_pool_connections, settings.DB_POOL_SIZE)
+        await ml_service.start()
+        await run_in_threadpool(_load_caches)
+    except Exception as e:
+        readiness.set_not_ready(f"Error en el warm-up: {e}")
+        logger.exception("Error en el warm-up")
+        return False
+
+    readiness.set_ready()
+    return True
+
+
+async def warm_up_until_ready(interval: float) -> None:
+    """Reintenta el warm-up cada interval segundos hasta que el worker quede listo"""
+    while True:
+        await asyncio.sleep(interval)
+        if await warm_up():
+            return
+
+
+def _open_pool_connections(count: int) -> None:
+    """Abre count conexiones a la vez y las devuelve al pool (quedan abiertas)"""
+    connections = []
+    try:
+        for _ in range(count):
+            connections.append(engine.connect())
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def _load_caches() -> None:
+    db = SessionLocal()
+    try:
+        question_catalog.load(db)
+        recommendation_catalog.load(db)
+        feature_schemas.get(db)
+    finally:
+        db.close()
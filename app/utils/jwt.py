@@ -1,29 +1,83 @@
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
-import os
-import pytz
+import hashlib
+import time
+from typing import NamedTuple
 
-from dotenv import load_dotenv
+from app.config import settings
+from app.utils.cache import LRUCache
+from app.utils.metrics import metrics
 
-load_dotenv()
-
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")
+# PyJWT (y su backend de cryptography) y pytz se importan en el primer uso:
+# acortan el arranque en frío de cada worker
 
 SECRET_KEY = "super-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# Payloads ya verificados, indexados por el digest del token, hasta su "exp"
+_verified_tokens = LRUCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
+    import jwt
+    import pytz
+    
     to_encode = data.copy()
     expire = datetime.now(pytz.timezone("America/Lima")) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_token(token: str):
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = _verified_tokens.get(digest)
+    
+    if payload is not None:
+        _record_cache_lookup(hit=True)
+        return payload
+    
+    _record_cache_lookup(hit=False)
+    
+    import jwt
+    
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
+    except jwt.PyJWTError:
         return None
+    
+    # Guardar solo mientras el token siga vigente
+    exp = payload.get("exp")
+    ttl = exp - time.time() if exp is not None else None
+    if ttl is None or ttl > 0:
+        _verified_tokens.set(digest, payload, ttl=ttl)
+    
+    return payload
+
+def _record_cache_lookup(hit: bool) -> None:
+    metrics.increment("jwt.cache.hits" if hit else "jwt.cache.misses")
+    hits = metrics.get_counter("jwt.cache.hits")
+    total = hits + metrics.get_counter("jwt.cache.misses")
+    metrics.set_gauge("jwt.cache.hit_rate", round(hits / total, 4))
+
+
+class TokenState(NamedTuple):
+    """Estado actual del usuario en la BD contra el que se validan los claims"""
+    token_version: int
+    role: str
+    active: bool
+
+
+# Estado por user_id, leído de la BD (compartida entre workers) y reutilizado
+# unos segundos: una revocación tarda como mucho TOKEN_STATE_CACHE_SECONDS en
+# aplicarse en todos los workers
+token_states = LRUCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_STATE_CACHE_SECONDS)
+
+def revoke_user_tokens(user) -> None:
+    """
+    Invalida los tokens emitidos a un usuario incrementando su token_version.
+    El cambio se guarda con el siguiente commit de la sesión.
+    """
+    user.token_version = (user.token_version or 0) + 1
+    token_states.pop(user.id)
+
+def is_token_revoked(state: TokenState, token_version: int) -> bool:
+    """True si el token fue emitido antes de la última revocación del usuario"""
+    return token_version < state.token_version
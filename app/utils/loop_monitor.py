@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, Optional, Union
+
+from anyio import to_thread
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+
+
+class LoopMonitor:
+    """
+    Muestrea el lag del event loop y la ocupación del threadpool de AnyIO
+    (donde Starlette ejecuta los endpoints def síncronos).
+
+    Con el watchdog activo, un hilo aparte detecta cuando el loop queda
+    bloqueado más de block_threshold segundos (ej: SQLAlchemy dentro de un
+    endpoint async) y registra el stack del hilo del loop en ese momento.
+    """
+
+    def __init__(self, interval: float = 0.5, window: int = 20, block_threshold: float = 0.1):
+        """
+        Args:
+            interval: Segundos entre muestras
+            window: Muestras recientes para calcular el lag máximo
+            block_threshold: Segundos sin responder para considerar el loop bloqueado
+        """
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self._lags = deque(maxlen=window)
+        self._stats: Dict[str, Number] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def set_threadpool_tokens(tokens: int) -> None:
+        """Fija la capacidad del threadpool por defecto (llamar dentro del loop, en el startup)"""
+        to_thread.current_default_thread_limiter().total_tokens = tokens
+
+    async def run(self) -> None:
+        """Toma una muestra cada interval segundos (tarea de fondo del startup)"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._sample((time.perf_counter() - started - self.interval) * 1000)
+
+    def snapshot(self) -> Dict[str, Number]:
+        return dict(self._stats)
+
+    def start_watchdog(self) -> None:
+        """Arranca el hilo que detecta bloqueos del loop (modo debug)"""
+        if self._watchdog is None:
+            self._stopped.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def stop_watchdog(self) -> None:
+        self._stopped.set()
+        self._watchdog = None
+
+    def _sample(self, lag_ms: float) -> None:
+        self._lags.append(max(lag_ms, 0.0))
+
+        limiter = to_thread.current_default_thread_limiter()
+        capacity = limiter.total_tokens
+        busy = limiter.borrowed_tokens
+
+        self._stats = {
+            "lag_ms": round(self._lags[-1], 2),
+            "lag_max_ms": round(max(self._lags), 2),
+            "threadpool_capacity": capacity,
+            "threadpool_busy": busy,
+            "threadpool_waiting": limiter.statistics().tasks_waiting,
+            "threadpool_utilization": round(busy / capacity, 4) if capacity else 0.0,
+        }
+
+        for name, value in self._stats.items():
+            metrics.set_gauge(f"loop.{name}", value)
+
+    def _beat(self) -> None:
+        self._last_beat = time.monotonic()
+
+    def _watch(self) -> None:
+        """
+        Encola un latido en el loop y revisa si se ejecutó a tiempo; si no,
+        el loop está bloqueado y se registra qué está ejecutando.
+        """
+        blocked_since = None
+
+        while not self._stopped.is_set():
+            loop = self._loop
+            if loop is None or loop.is_closed():
+                self._stopped.wait(self.block_threshold)
+                continue
+
+            sent = time.monotonic()
+            try:
+                loop.call_soon_threadsafe(self._beat)
+            except RuntimeError:  # El loop se cerró (shutdown)
+                return
+            self._stopped.wait(self.block_threshold)
+
+            if self._last_beat >= sent:
+                if blocked_since is not None:
+                    logger.warning("Event loop bloqueado durante %.0f ms", (time.monotonic() - blocked_since) * 1000)
+                    blocked_since = None
+                continue
+
+            if blocked_since is None:
+                blocked_since = sent
+                metrics.increment("loop.blocking_calls")
+                frame = sys._current_frames().get(self._loop_thread_id)
+                stack = "".join(traceback.format_stack(frame)) if frame else "(stack no disponible)"
+                logger.warning(
+                    "Llamada bloqueante en el event loop (> %.0f ms):\n%s",
+                    self.block_threshold * 1000,
+                    stack
+                )
+
+
+# Instancia global del monitor
+loop_monitor = LoopMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    block_threshold=settings.LOOP_BLOCKING_THRESHOLD_MS / 1000
+)
@@ -0,0 +1,42 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Union
+
+
+Number = Union[int, float]
+
+
+class Metrics:
+    """Registro en memoria de contadores y gauges del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Number] = defaultdict(int)
+        self._gauges: Dict[str, Number] = {}
+
+    def increment(self, name: str, value: Number = 1) -> None:
+        """Suma value al contador name"""
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: Number) -> None:
+        """Fija el valor actual del gauge name"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def get_counter(self, name: str) -> Number:
+        """Valor actual del contador name (0 si no existe)"""
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> Dict[str, Dict[str, Number]]:
+        """Copia consistente de todas las métricas"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+            }
+
+
+# Instancia global de métricas
+metrics = Metrics()
@@ -0,0 +1,136 @@
+import logging
+from pathlib import Path
+from typing import List, Set
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+
+logger = logging.getLogger(__name__)
+
+# Archivos NNN_descripcion.sql; la versión es el nombre sin extensión
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "migrations"
+
+# Clave del advisory lock: un solo proceso aplica migraciones a la vez
+MIGRATIONS_LOCK_ID = 7268310
+
+CREATE_VERSIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(255) PRIMARY KEY,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def list_migrations() -> List[str]:
+    """Versiones disponibles en migrations/, en orden de aplicación"""
+    return sorted(path.stem for path in MIGRATIONS_DIR.glob("*.sql"))
+
+
+def applied_migrations(conn: Connection) -> Set[str]:
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending_migrations(engine: Engine) -> List[str]:
+    """
+    Chequeo barato para el arranque de cada worker: una sola consulta,
+    sin DDL. Si no existe schema_migrations, todas están pendientes.
+    """
+    try:
+        with engine.connect() as conn:
+            applied = applied_migrations(conn)
+    except SQLAlchemyError:
+        return list_migrations()
+
+    return [version for version in list_migrations() if version not in applied]
+
+
+def schema_drift(engine: Engine) -> List[str]:
+    """
+    Tablas y columnas de los modelos que no existen en la BD ("tabla" o
+    "tabla.columna"). Detecta un esquema que no coincide con el código
+    aunque schema_migrations diga que no hay nada pendiente (ej: una BD
+    creada antes de que existiera el runner de migraciones).
+
+    Una sola consulta al catálogo de la BD (Inspector.get_multi_columns).
+    """
+    from app.database import Base
+    import app.models  # noqa: F401 - registra todos los modelos en Base.metadata
+
+    with engine.connect() as conn:
+        existing = {
+            table: {column["name"] for column in columns}
+            for (_, table), columns in inspect(conn).get_multi_columns().items()
+        }
+
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing:
+            missing.append(table.name)
+            continue
+
+        missing.extend(
+            f"{table.name}.{column.name}"
+            for column in table.columns
+            if column.name not in existing[table.name]
+        )
+
+    return missing
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """
+    Aplica las migraciones pendientes (una vez por deploy, no por worker).
+
+    - BD vacía: crea el esquema actual con Base.metadata.create_all y marca
+      todas las migraciones como aplicadas (baseline).
+    - BD existente: aplica cada archivo pendiente en su propia transacción.
+
+    Retorna las versiones aplicadas.
+    """
+    from app.database import Base
+    import app.models  # noqa: F401 - registra todos los modelos en Base.metadata
+
+    with engine.connect() as conn:
+        is_postgres = conn.dialect.name == "postgresql"
+
+        if is_postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATIONS_LOCK_ID})
+            conn.commit()
+
+        try:
+            inspector = inspect(conn)
+            is_empty = not inspector.has_table("users")
+
+            conn.execute(text(CREATE_VERSIONS_TABLE))
+            conn.commit()
+
+            applied = applied_migrations(conn)
+            pending = [version for version in list_migrations() if version not in applied]
+
+            if is_empty:
+                Base.metadata.create_all(bind=conn)
+                _record(conn, pending)
+                conn.commit()
+                logger.info("Esquema creado desde los modelos (baseline: %s)", ", ".join(pending) or "-")
+                return pending
+
+            for version in pending:
+                sql = (MIGRATIONS_DIR / f"{version}.sql").read_text(encoding="utf-8")
+                conn.exec_driver_sql(sql)
+                _record(conn, [version])
+                conn.commit()
+                logger.info("Migración aplicada: %s", version)
+
+            return pending
+        finally:
+            if is_postgres:
+                conn.rollback()
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATIONS_LOCK_ID})
+                conn.commit()
+
+
+def _record(conn: Connection, versions: List[str]) -> None:
+    for version in versions:
+        conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:version)"), {"version": version})
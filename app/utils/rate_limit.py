@@ -0,0 +1,143 @@
+import math
+import threading
+import time
+from typing import Dict, Hashable, List
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+class _Shard:
+    __slots__ = ("lock", "buckets", "last_sweep")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets: Dict[Hashable, List[float]] = {}  # key -> [tokens, actualizado_en]
+        self.last_sweep = time.monotonic()
+
+
+class TokenBucketLimiter:
+    """
+    Rate limiter en memoria con un token bucket por key (IP, username, ...).
+
+    - Cada key acumula hasta burst intentos y recupera rate por segundo.
+    - Los buckets se reparten en shards con su propio lock, para que los
+      hilos del threadpool no compitan por uno solo.
+    - La memoria está acotada: cada sweep_interval se eliminan los buckets
+      ya llenos (equivalen a no tener entrada) y si un shard llega a su
+      máximo se desaloja el bucket usado hace más tiempo.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        max_keys: int = 100000,
+        shards: int = 16,
+        sweep_interval: float = 60.0
+    ):
+        """
+        Args:
+            name: Nombre para las métricas (ratelimit.<name>.rejected)
+            rate: Intentos recuperados por segundo
+            burst: Intentos seguidos permitidos con el bucket lleno
+            max_keys: Keys en memoria como máximo, entre todos los shards
+        """
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.sweep_interval = sweep_interval
+        self._shards = [_Shard() for _ in range(shards)]
+        self._max_per_shard = max(1, max_keys // shards)
+
+    def consume(self, key: Hashable) -> float:
+        """
+        Consume un intento de key.
+        Retorna 0 si está permitido, o los segundos hasta el siguiente intento.
+        """
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+
+        with shard.lock:
+            if now - shard.last_sweep >= self.sweep_interval:
+                self._sweep(shard, now)
+
+            bucket = shard.buckets.pop(key, None)  # Se reinserta al final: orden por último uso
+
+            if bucket is None:
+                if len(shard.buckets) >= self._max_per_shard:
+                    shard.buckets.pop(next(iter(shard.buckets)))
+                bucket = [float(self.burst), now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            shard.buckets[key] = bucket
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+
+            return (1 - bucket[0]) / self.rate
+
+    def refund(self, key: Hashable) -> None:
+        """Devuelve un intento consumido (ej: login exitoso, que no debe contar como intento fallido)"""
+        shard = self._shards[hash(key) % len(self._shards)]
+
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(self.burst, bucket[0] + 1)
+
+    def _sweep(self, shard: _Shard, now: float) -> None:
+        """Elimina los buckets que ya se recargaron por completo"""
+        full = [
+            key for key, (tokens, updated_at) in shard.buckets.items()
+            if tokens + (now - updated_at) * self.rate >= self.burst
+        ]
+        for key in full:
+            del shard.buckets[key]
+        shard.last_sweep = now
+
+
+def enforce_rate_limit(limiter: TokenBucketLimiter, key: Hashable) -> None:
+    """
+    Raises:
+        HTTPException: 429 con Retry-After si key excedió su límite
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+
+    retry_after = limiter.consume(key)
+
+    if retry_after > 0:
+        metrics.increment(f"ratelimit.{limiter.name}.rejected")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiados intentos. Intenta nuevamente más tarde",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+
+# Limitadores de los endpoints con bcrypt (por minuto en la configuración)
+login_ip_limiter = TokenBucketLimiter(
+    "login_ip",
+    rate=settings.LOGIN_RATE_PER_MINUTE_IP / 60,
+    burst=settings.LOGIN_BURST_IP,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS
+)
+login_user_limiter = TokenBucketLimiter(
+    "login_user",
+    rate=settings.LOGIN_RATE_PER_MINUTE_USER / 60,
+    burst=settings.LOGIN_BURST_USER,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS
+)
+register_ip_limiter = TokenBucketLimiter(
+    "register_ip",
+    rate=settings.REGISTER_RATE_PER_MINUTE_IP / 60,
+    burst=settings.REGISTER_BURST_IP,
+    max_keys=settings.RATE_LIMIT_MAX_KEYS
+)
@@ -0,0 +1,29 @@
+import threading
+from typing import Dict, Union
+
+
+class Readiness:
+    """Estado de preparación del worker (listo para recibir tráfico o no, y por qué)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = False
+        self.reason = "Iniciando"
+
+    def set_ready(self) -> None:
+        with self._lock:
+            self.ready = True
+            self.reason = None
+
+    def set_not_ready(self, reason: str) -> None:
+        with self._lock:
+            self.ready = False
+            self.reason = reason
+
+    def snapshot(self) -> Dict[str, Union[bool, str, None]]:
+        with self._lock:
+            return {"ready": self.ready, "reason": self.reason}
+
+
+# Instancia global del estado
+readiness = Readiness()
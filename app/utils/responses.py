@@ -0,0 +1,83 @@
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse que serializa directamente a bytes con pydantic-core.
+
+    Acepta modelos Pydantic, listas de modelos, dicts con datetimes/enums
+    o bytes ya serializados (ver serialize_as), sin pasar por
+    jsonable_encoder ni por el módulo json de la stdlib.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return to_json(content)
+
+
+@lru_cache(maxsize=None)
+def _get_adapter(schema: Any) -> TypeAdapter:
+    """TypeAdapter cacheado por tipo (construirlo es caro)"""
+    return TypeAdapter(schema)
+
+
+def serialize_as(schema: Any, content: Any) -> bytes:
+    """
+    Valida el contenido contra un schema y lo serializa a JSON en un solo paso.
+
+    Args:
+        schema: Tipo de respuesta (ej: List[UserResponse])
+        content: Objetos ORM, dicts o modelos Pydantic
+
+    Returns:
+        JSON listo para enviar en un FastJSONResponse
+    """
+    adapter = _get_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(content, from_attributes=True))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """
+    Evalúa los headers condicionales del request (If-None-Match tiene prioridad
+    sobre If-Modified-Since). Si retorna True se puede responder 304.
+
+    If-None-Match usa comparación débil: W/"x" y "x" son la misma versión.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [_opaque_tag(tag) for tag in if_none_match.split(",")]
+        return "*" in tags or _opaque_tag(etag) in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:  # "-0000" u otra zona desconocida: se interpreta como UTC
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def weak_etag(tag: str) -> str:
+    """
+    Versión débil de un ETag. Se usa en respuestas que pueden ir comprimidas:
+    el cuerpo cambia según Content-Encoding, pero el contenido es el mismo.
+    """
+    return tag if tag.startswith("W/") else f"W/{tag}"
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
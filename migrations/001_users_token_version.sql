@@ -0,0 +1,2 @@
+-- Versión de tokens por usuario (modo de autenticación stateless)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
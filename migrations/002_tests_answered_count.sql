@@ -0,0 +1,11 @@
+-- Contador de respuestas por test (evita COUNT(*) sobre test_responses)
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS answered_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE tests t
+SET answered_count = c.total
+FROM (
+    SELECT test_id, COUNT(*) AS total
+    FROM test_responses
+    GROUP BY test_id
+) c
+WHERE c.test_id = t.id;
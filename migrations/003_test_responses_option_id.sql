@@ -0,0 +1,11 @@
+-- Respuestas codificadas como option_id (answer_value queda solo para preguntas sin opciones)
+ALTER TABLE test_responses ADD COLUMN IF NOT EXISTS option_id INTEGER REFERENCES question_options(id);
+ALTER TABLE test_responses ALTER COLUMN answer_value DROP NOT NULL;
+
+UPDATE test_responses r
+SET option_id = o.id,
+    answer_value = NULL
+FROM question_options o
+WHERE o.question_id = r.question_id
+  AND o.option_value = r.answer_value
+  AND r.option_id IS NULL;
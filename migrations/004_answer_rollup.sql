@@ -0,0 +1,13 @@
+-- Conteos precalculados para la distribución de respuestas (ver app/commands/refresh_answer_rollup.py)
+CREATE TABLE IF NOT EXISTS answer_rollup (
+    id SERIAL PRIMARY KEY,
+    question_id INTEGER NOT NULL,
+    option_id INTEGER,
+    answer_value VARCHAR(100),
+    facultad VARCHAR(255) NOT NULL,
+    ciclo INTEGER NOT NULL,
+    prediction predictionresult NOT NULL,
+    total INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_answer_rollup_facultad_ciclo ON answer_rollup (facultad, ciclo);
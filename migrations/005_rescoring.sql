@@ -0,0 +1,24 @@
+-- Predicciones de modelos candidatos (rescore en modo shadow)
+CREATE TABLE IF NOT EXISTS shadow_test_results (
+    id SERIAL PRIMARY KEY,
+    test_id INTEGER NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+    prediction predictionresult NOT NULL,
+    probability DOUBLE PRECISION NOT NULL,
+    model_version VARCHAR(50) NOT NULL,
+    predicted_at TIMESTAMP NOT NULL DEFAULT now(),
+    CONSTRAINT unique_shadow_test_model UNIQUE (test_id, model_version)
+);
+
+CREATE INDEX IF NOT EXISTS ix_shadow_test_results_id ON shadow_test_results (id);
+CREATE INDEX IF NOT EXISTS ix_shadow_test_results_test_id ON shadow_test_results (test_id);
+
+-- Progreso de los trabajos de rescore
+CREATE TABLE IF NOT EXISTS rescore_checkpoints (
+    job_name VARCHAR(100) PRIMARY KEY,
+    mode VARCHAR(20) NOT NULL,
+    last_test_id INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    started_at TIMESTAMP NOT NULL DEFAULT now(),
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
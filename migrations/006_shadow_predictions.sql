@@ -0,0 +1,18 @@
+-- Comparación en vivo entre el modelo actual y un candidato (SHADOW_ML_SERVICE_URL)
+CREATE TABLE IF NOT EXISTS shadow_predictions (
+    id SERIAL PRIMARY KEY,
+    test_id INTEGER NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+    primary_prediction predictionresult NOT NULL,
+    primary_probability DOUBLE PRECISION NOT NULL,
+    primary_model_version VARCHAR(50) NOT NULL,
+    primary_latency_ms DOUBLE PRECISION NOT NULL,
+    candidate_prediction predictionresult,
+    candidate_probability DOUBLE PRECISION,
+    candidate_model_version VARCHAR(50),
+    candidate_latency_ms DOUBLE PRECISION,
+    candidate_error VARCHAR(255),
+    created_at TIMESTAMP NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_shadow_predictions_id ON shadow_predictions (id);
+CREATE INDEX IF NOT EXISTS ix_shadow_predictions_test_id ON shadow_predictions (test_id);
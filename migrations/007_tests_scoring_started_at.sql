@@ -0,0 +1,2 @@
+-- Marca de un complete en curso: la llamada al ML se hace sin mantener el bloqueo del test
+ALTER TABLE tests ADD COLUMN IF NOT EXISTS scoring_started_at TIMESTAMP;
@@ -0,0 +1,6 @@
+-- Versiones de los caches en memoria: un cambio en un worker invalida los de los demás
+CREATE TABLE IF NOT EXISTS cache_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -0,0 +1,7 @@
+-- Tests que un trabajo de rescore no pudo puntuar (se reintentan al reanudarlo)
+CREATE TABLE IF NOT EXISTS rescore_failures (
+    job_name VARCHAR(100) NOT NULL REFERENCES rescore_checkpoints(job_name) ON DELETE CASCADE,
+    test_id INTEGER NOT NULL REFERENCES tests(id) ON DELETE CASCADE,
+    failed_at TIMESTAMP NOT NULL DEFAULT now(),
+    PRIMARY KEY (job_name, test_id)
+);